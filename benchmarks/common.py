@@ -0,0 +1,30 @@
+""" Synthetic views shared by the benchmarks """
+import os
+import sys
+
+sys.path.insert(0, os.path.realpath(os.path.join(__file__, '..', '..')))
+
+from fair.response import JsonRaise
+
+PARAM_TYPES = ('Int', 'Str', 'Float')
+PARAM_VALUES = {'Int': 1, 'Str': 'text', 'Float': 1.5}
+
+
+def make_view(index, params, plugins=()):
+    """ view with ``params`` parameters (Int / Str / Float in turn, odd ones are required) """
+    def view(**kwargs):
+        return JsonRaise('success', kwargs)
+    lines = ['Benchmark view %d' % index, '', 'Synthetic view for benchmark.', '']
+    if plugins:
+        lines.append(':plugin: %s' % ' '.join(plugins))
+    lines += [':raise error_%d: Error %d' % (code, code) for code in range(3)]
+    lines += [':param %s %s param_%d: parameter %d' % (PARAM_TYPES[i % 3], '*' if i % 2 else '', i, i)
+              for i in range(params)]
+    view.__doc__ = '\n'.join(lines)
+    view.__name__ = 'view_%d' % index
+    return view
+
+
+def make_params(params):
+    """ valid parameter values of make_view's view """
+    return {'param_%d' % i: PARAM_VALUES[PARAM_TYPES[i % 3]] for i in range(params)}
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+""" Meta memory footprint per route
+
+    python benchmarks/meta_memory.py [routes] [params]
+
+Output json: {"routes": n, "params": n, "bytes_per_route": n}
+"""
+import sys
+import gc
+import json
+import tracemalloc
+
+from common import make_view
+from fair import Fair
+from fair.api_meta import Meta
+
+
+def measure(routes=1000, params=10):
+    app = Fair(__name__)
+    app.api.doc_parser = 'light'
+    views = [make_view(index, params) for index in range(routes)]
+    Meta(app.api, views[0], '/warm_up', {'GET'})      # import and cache everything lazy loaded
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    metas = [Meta(app.api, view, '/benchmark/%d' % index, {'GET'}) for index, view in enumerate(views)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {'routes': len(metas), 'params': params, 'bytes_per_route': (after - before) // len(metas)}
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    print(json.dumps(measure(*arguments)))
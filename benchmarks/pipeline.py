@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+""" Fair request pipeline benchmark
+
+    python benchmarks/pipeline.py [--quick] [--requests 2000] [--output result.json]
+
+Each case builds a Fair app with synthetic routes and requests the last route:
+    routes: 1, 100, 1000
+    params: 0, 10, 50
+    mode: GET query string, POST form, POST json (and GET with json_p plugin)
+    driver: werkzeug test client, WSGI (app.wsgi_app called directly)
+
+Measured: requests per second, per phase time (Setts(stats=True) pass), peak allocated bytes per request,
+and startup time of routes registration (Meta parsing) with docutils and light doc parser.
+Output is json, so results of versions can be compared.
+"""
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from werkzeug.test import EnvironBuilder
+
+from common import make_view, make_params
+import fair
+from fair import Fair
+from fair.api_setts import Setts
+
+MODES = {
+    # mode: (http method, plugins)
+    'query': ('GET', ()),
+    'json_p': ('GET', ('json_p',)),
+    'form': ('POST', ()),
+    'json': ('POST', ()),
+}
+
+
+def build_app(routes, params, mode, stats=False, doc_parser='light'):
+    method, plugins = MODES[mode]
+    app = Fair(__name__, api=Setts(None, stats=stats, doc_parser=doc_parser))
+    for index in range(routes):
+        app.route('/bench/%d' % index, methods=method)(make_view(index, params, plugins))
+    return app
+
+
+def request_kwargs(params, mode):
+    values = make_params(params)
+    if mode == 'query':
+        return {'method': 'GET', 'query_string': values}
+    if mode == 'json_p':
+        values['callback'] = 'cb'
+        return {'method': 'GET', 'query_string': values}
+    if mode == 'form':
+        return {'method': 'POST', 'data': values}
+    return {'method': 'POST', 'json': values}
+
+
+def client_driver(app, path, kwargs):
+    client = app.test_client()
+
+    def request():
+        return client.open(path, **kwargs).data
+    return request
+
+
+def wsgi_driver(app, path, kwargs):
+    environ = EnvironBuilder(path=path, **kwargs).get_environ()
+    body = environ['wsgi.input'].read()
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    def request():
+        request_environ = dict(environ)
+        request_environ['wsgi.input'] = io.BytesIO(body)
+        return b''.join(app.wsgi_app(request_environ, start_response))
+    return request
+
+
+DRIVERS = {'client': client_driver, 'wsgi': wsgi_driver}
+
+
+def check(content):
+    if b'"success"' not in content:
+        raise Exception('benchmark request failed: %s' % content[:200])
+
+
+def run_case(routes, params, mode, driver, requests):
+    path = '/bench/%d' % (routes - 1)
+    kwargs = request_kwargs(params, mode)
+
+    # throughput
+    request = DRIVERS[driver](build_app(routes, params, mode), path, kwargs)
+    check(request())
+    start = time.perf_counter()
+    for _ in range(requests):
+        request()
+    elapsed = time.perf_counter() - start
+
+    # per phase time
+    app = build_app(routes, params, mode, stats=True)
+    request = DRIVERS[driver](app, path, kwargs)
+    for _ in range(requests):
+        request()
+    phases = list(app.api.stats.to_dict(path)[path].values())[0]
+
+    # allocations
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(requests, 200)):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        request()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    return {
+        'routes': routes,
+        'params': params,
+        'mode': mode,
+        'driver': driver,
+        'requests': requests,
+        'requests_per_second': round(requests / elapsed, 1),
+        'mean_us': round(elapsed / requests * 1e6, 2),
+        'phases_mean_ns': {phase: item['mean_ns'] for phase, item in phases.items()},
+        'peak_bytes_per_request': sum(peaks) // len(peaks),
+    }
+
+
+def run_startup(routes, params, doc_parser):
+    start = time.perf_counter()
+    build_app(routes, params, 'query', doc_parser=doc_parser)
+    elapsed = time.perf_counter() - start
+    return {'routes': routes, 'params': params, 'doc_parser': doc_parser,
+            'seconds': round(elapsed, 4), 'ms_per_route': round(elapsed / routes * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fair request pipeline benchmark')
+    parser.add_argument('--quick', action='store_true', help='small matrix (1/100 routes, 0/10 params)')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per case')
+    parser.add_argument('--output', help='write json to the file instead of stdout')
+    args = parser.parse_args()
+
+    route_counts = (1, 100) if args.quick else (1, 100, 1000)
+    param_counts = (0, 10) if args.quick else (0, 10, 50)
+
+    cases = []
+    for routes in route_counts:
+        for params in param_counts:
+            for mode in MODES:
+                for driver in DRIVERS:
+                    cases.append(run_case(routes, params, mode, driver, args.requests))
+                    print(json.dumps(cases[-1]), file=sys.stderr)
+
+    startup = [run_startup(routes, params, doc_parser)
+               for routes in route_counts for params in param_counts for doc_parser in ('docutils', 'light')]
+
+    result = {
+        'fair_version': fair.__version__,
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cases': cases,
+        'startup': startup,
+    }
+    content = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(content)
+    else:
+        print(content)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
 import os
+import re
+import json
 import logging
-import docutils
-from docutils.core import publish_doctree
+from inspect import cleandoc, iscoroutinefunction
 
 from .api_setts import Setts
-from .parameter import Param, List
-from .utility import rst_to_html
+from .parameter import ParamSpec, Schema, get_param_type
+from .flight import SingleFlight
+from .cache import CacheDefineError, parse_cache_options
+from .utility import rst_to_html, compile_structure_params
+from .response import JsonStreamRaise
 
 log = logging.getLogger(__name__)
 
@@ -21,33 +25,15 @@ class Meta(object):
         response: response,
         plugins: (class_A, class_B),
         plugin_keys: ('plugin_a', 'plugin_b'),
-        param_not_null: ('xx', 'yy'),
-        param_allow_null: ('zz',),
-        param_index: ('xx', 'yy', 'zz'),
+        plugin_params: {'xx', 'yy'},
+        before_request_hooks: (plugin_a.before_request, ...),
+        after_request_hooks: (plugin_b.after_request, ...),
+        cache: ResponseCache or None,
+        single_flight: SingleFlight or None,
         param_list: (
-            {
-                name: xxx,
-                type: class_A,
-                requisite: True/False,
-                description: 'xxx'
-            },
+            ParamSpec(name, type, requisite, description),
             ...
         ),
-        param_dict: {
-            xxx: {
-                name: xxx,
-                type: class_A,
-                requisite: True/False,
-                description: 'description'
-            },
-            ...
-        },
-        param_default: {
-            'xx': None,
-            'yy': None,
-            'zz': None
-        }
-        code_index: ('xx', 'yy', 'zz'),
         code_list: (
             ('xx', 'xxx', 'common'),
             ('yy', 'yyy', 'plugin'),
@@ -58,26 +44,47 @@ class Meta(object):
             'xx': 'xxx',
             'yy': 'yyy',
             'zz': 'zzz'
+        },
+        code_prefix: {
+            'xx': b'{"code": "xx", "info": "xxx", "data": ',
+            ...
+        },
+        fields: {
+            'other_field_name': 'content'
         }
     }
+
+    Computed from param_list / code_list (not stored):
+        param_not_null: ('xx', 'yy'),
+        param_allow_null: ('zz',),
+        param_index: ('xx', 'yy', 'zz'),
+        param_dict: {'xx': ParamSpec, ...},
+        param_default: {'xx': None, 'yy': None, 'zz': None},
+        param_types: {'xx': class_A, ...},
+        code_index: ('xx', 'yy', 'zz')
     """
+    __slots__ = ('setts', 'rule', 'http_methods', 'is_coroutine', 'stats', 'cache', 'single_flight',
+                 'title_source', 'description_source', '__title', '__description', 'response_cls',
+                 'plugins', 'plugin_keys', 'plugin_params', 'before_request_hooks', 'after_request_hooks',
+                 'param_list', 'code_list', 'code_dict', 'code_prefix', 'structure_params', 'fields')
+
     def __init__(self, setts, view_func, rule, http_methods):
+        self.fields = {}                                    # doc string fields not defined by Meta
         self.setts = setts                                  # type: Setts
         self.rule = rule
         self.http_methods = http_methods    # type: tuple
-        self.title = ''
-        self.description = None
+        self.is_coroutine = iscoroutinefunction(view_func)  # async def view
+        self.stats = setts.stats.endpoint(rule, http_methods) if setts.stats else None
+        self.cache = None                   # type: ResponseCache
+        self.single_flight = None           # type: SingleFlight
+        self.title_source = ()                             # rst sources, title and description are rendered
+        self.description_source = ()                       # to html at the first access
+        self.__title = None
+        self.__description = None
         self.response_cls = None
         self.plugins = []
         self.plugin_keys = []
         self.param_list = []
-        self.param_dict = {}
-        self.param_index = []
-        self.param_default = {}
-        self.param_not_null = []
-        self.param_allow_null = []
-        self.param_types = {}
-        self.code_index = []
         self.code_list = []
         self.code_dict = {}
         self.__code_set('success', 'Success', 'common')
@@ -86,74 +93,149 @@ class Meta(object):
         if not view_func.__doc__:
             raise Exception('%s doc not defined' % view_func.__name__)
         try:
-            doc_string = view_func.__doc__
-            doc_tree = publish_doctree(doc_string)
-            self.__parse_doc_tree(view_func, doc_tree)
-            self.__clear_up()
+            doc = self.__load_doc(view_func.__doc__)
+            self.title_source = tuple(doc['title'])
+            self.description_source = tuple(doc['description'])
+            for name, content in doc['fields']:
+                self.__parse_doc_field(view_func, name, content)
+        except CacheDefineError:
+            raise
         except Exception:
             log.exception('meta defined error')
+        self.__clear_up()
 
+        profiler = setts.startup_profiler
         for plugin in self.plugins:
-            plugin.init_view(setts, view_func, rule, http_methods)
+            if profiler:
+                with profiler.measure(rule, 'init_view'):
+                    plugin.init_view(setts, view_func, rule, http_methods)
+            else:
+                plugin.init_view(setts, view_func, rule, http_methods)
             # add plugin.parameters to method.meta.param_list.
             if plugin.parameters:
                 plugin_parameters = list(plugin.parameters)
                 param_list = list(self.param_list)
                 while plugin_parameters:
                     p = plugin_parameters.pop()
-                    param_list.insert(0, {'name': p[0], 'type': p[1], 'requisite': p[2], 'description': p[3]})
+                    param_list.insert(0, ParamSpec(p[0], p[1], p[2], p[3]))
                 self.param_list = tuple(param_list)
 
+        self.__build_plugin_hooks()
+
+        self.structure_params = compile_structure_params(view_func, self)
+
+        # encoded response envelope before data, response body is: prefix + data + b'}'
+        self.code_prefix = {}
+        for code, info in self.code_dict.items():
+            prefix = '{"code": %s, "info": %s, "data": ' % (json.dumps(code), json.dumps(info))
+            self.code_prefix[code] = prefix.encode()
+
+    def __getattr__(self, name):
+        # other doc string fields, e.g. ':version: 2' -> meta.version
+        if name != 'fields' and name in self.fields:
+            return self.fields[name]
+        raise AttributeError("'Meta' object has no attribute '%s'" % name)
+
+    @property
+    def title(self):
+        if self.__title is None:
+            self.__title = ''.join(rst_to_html(source) for source in self.title_source)
+        return self.__title
+
+    @property
+    def description(self):
+        if self.__description is None:
+            self.__description = (os.linesep * 2).join(rst_to_html(source) for source in self.description_source)
+        return self.__description
+
+    @property
+    def view_params(self):
+        """ parameters defined by view's doc string (not include plugin's parameters) """
+        return tuple(param for param in self.param_list if param.name not in self.plugin_params)
+
+    @property
+    def param_not_null(self):
+        return tuple(param.name for param in self.view_params if param.requisite)
+
+    @property
+    def param_allow_null(self):
+        return tuple(param.name for param in self.view_params if not param.requisite)
+
+    @property
+    def param_index(self):
+        return self.param_not_null + self.param_allow_null
+
+    @property
+    def param_dict(self):
+        return {param.name: param for param in self.view_params}
+
+    @property
+    def param_default(self):
+        return {param.name: None for param in self.view_params}
+
+    @property
+    def param_types(self):
+        return {param.name: param.type for param in self.view_params}
+
+    @property
+    def code_index(self):
+        return tuple(code[0] for code in self.code_list)
+
     def response(self, code, data=None, status=None):
-        return self.response_cls(code, data=data, status=status)
+        return self.response_cls(code, data=data, status=status, meta=self)
 
     def __clear_up(self):
-        if self.param_not_null:
-            self.code_index.insert(2, 'param_missing')
+        if any(param.requisite for param in self.param_list) or 'param_missing' in self.code_dict:
+            # Obj's required fields add it among the type codes, it's common
+            self.code_list = [code for code in self.code_list if code[0] != 'param_missing']
             self.code_list.insert(2, ('param_missing', 'Missing parameter', 'common'))
             self.code_dict['param_missing'] = 'Missing parameter'
         self.plugins = tuple(self.plugins)
         self.plugin_keys = tuple(self.plugin_keys)
         self.param_list = tuple(self.param_list)
-        self.param_not_null = tuple(self.param_not_null)
-        self.param_allow_null = tuple(self.param_allow_null)
-        self.param_index = self.param_not_null + self.param_allow_null
-        self.code_index = tuple(self.code_index)
         self.code_list = tuple(self.code_list)
         self.response_cls = self.response_cls or self.setts.responses['default']
-        self.description = self.description or ''
+        if self.single_flight and issubclass(self.response_cls, JsonStreamRaise):
+            # the followers share the leader's response, a streamed data can be consumed only once
+            raise Exception('Error define in %s: single_flight not support stream response.' % self.rule)
 
     def __code_set(self, error_code, error_message, category='biz'):
-        if error_code not in self.code_index:
-            self.code_index.append(error_code)
+        if error_code not in self.code_dict:
             self.code_list.append((error_code, error_message, category))
             self.code_dict[error_code] = error_message
 
-    def __parse_doc_tree(self, view_func, doc_tree):
-        if type(doc_tree) == docutils.nodes.term:
-            self.title = rst_to_html(doc_tree.rawsource)
-            return
+    def __build_plugin_hooks(self):
+        from .plugin import Plugin
+        # bound hooks of plugins which override them, and the parameters plugins used
+        # after_request hooks run in reverse order, the first plugin handle the final response,
+        # except plugins which must see the final body (after_request_last, e.g. compress) run at the end
+        self.before_request_hooks = tuple(plugin.before_request for plugin in self.plugins
+                                          if type(plugin).before_request is not Plugin.before_request)
+        after_plugins = [plugin for plugin in reversed(self.plugins)
+                         if type(plugin).after_request is not Plugin.after_request]
+        after_plugins.sort(key=lambda plugin: plugin.after_request_last)    # stable, keeps the order
+        self.after_request_hooks = tuple(plugin.after_request for plugin in after_plugins)
+        self.plugin_params = frozenset(parameter[0] for plugin in self.plugins for parameter in plugin.parameters)
 
-        if type(doc_tree) == docutils.nodes.paragraph:
-            if self.description is None:
-                self.title = self.title + rst_to_html(doc_tree.rawsource)
-                self.description = ''
-            elif self.description == '':
-                self.description = rst_to_html(doc_tree.rawsource)
-            else:
-                self.description = self.description + os.linesep * 2 + rst_to_html(doc_tree.rawsource)
-            return
+    def __load_doc(self, doc_string):
+        profiler = self.setts.startup_profiler
+        if profiler:
+            with profiler.measure(self.rule, 'doc_parse'):
+                return self.__parse_doc(doc_string, profiler.wrap(self.rule, 'rst_to_html', rst_to_html))
+        return self.__parse_doc(doc_string, rst_to_html)
 
-        if type(doc_tree) == docutils.nodes.field:
-            self.__parse_doc_field(view_func, doc_tree)
-            return
+    def __parse_doc(self, doc_string, render):
+        if self.setts.doc_parser == 'light':
+            return parse_doc_string_light(doc_string)
+        meta_cache = self.setts.meta_cache
+        doc = meta_cache.get(doc_string) if meta_cache else None
+        if doc is None:
+            doc = parse_doc_string(doc_string, render)
+            if meta_cache:
+                meta_cache.set(doc_string, doc)
+        return doc
 
-        for item in doc_tree.children:
-            self.__parse_doc_tree(view_func, item)
-
-    def __parse_doc_field(self, view_func, doc_field):
-        name = doc_field.children[0].astext()
-        content = rst_to_html(doc_field.children[1].rawsource)
+    def __parse_doc_field(self, view_func, name, content):
         if name == 'response':
             self.response_cls = self.setts.responses[content]
         elif name == 'plugin':
@@ -165,41 +247,112 @@ class Meta(object):
                 self.plugin_keys.append(item)
                 for error_code, error_message in plugin.error_codes.items():
                     self.__code_set(error_code, error_message, 'plugin ' + item)
+        elif name == 'cache':
+            if set(self.http_methods) != {'GET'}:
+                raise CacheDefineError('Error define in %s: cache only support GET method.' % self.rule)
+            self.cache = self.setts.cache_backend(**parse_cache_options(self.rule, content))
+        elif name == 'single_flight':
+            if set(self.http_methods) != {'GET'}:
+                raise CacheDefineError('Error define in %s: single_flight only support GET method.' % self.rule)
+            self.single_flight = SingleFlight()
         elif name.startswith('raise '):
             self.__code_set(name[6:], content)
         elif name.startswith('param '):
             items = name[6:].split()
-            param_type = items[0]
-            if param_type.endswith(']'):
-                sub_type = self.setts.parameter_types.get(param_type.split('[')[1][:-1])
-                param_type = self.setts.parameter_types.get(param_type.split('[')[0])
-                param_type = param_type(sub_type)
-            else:
-                param_type = self.setts.parameter_types.get(param_type)
+            param_type = get_param_type(items[0], self.setts.parameter_types)
+            if isinstance(param_type, type) and issubclass(param_type, Schema):
+                raise Exception('Schema %s is used by Obj[%s] in %s' % (items[0], items[0], self.rule))
+            if isinstance(param_type, type) and param_type.has_sub_type:
+                raise Exception('%s need a sub type in %s, e.g. List[Int]' % (items[0], self.rule))
             if not param_type:
                 error = '%s.%s use undefined parameter type %s'
-                raise Exception(error % (self.__name__, view_func.__name__, items[0]))
+                raise Exception(error % (view_func.__module__, view_func.__name__, items[0]))
             for request_method in self.http_methods:
                 if request_method not in ('HEAD', 'OPTIONS'):
                     if request_method not in param_type.support:
                         error = 'parameter %s not support http %s method in %s'
                         raise Exception(error % (param_type.__name__, request_method, self.rule))
 
-            param = {'name': items[-1], 'type': param_type, 'requisite': False, 'description': content}
-            if len(items) > 2 and items[1] == '*':
-                param['requisite'] = True
-                self.param_not_null.append(items[-1])
+            requisite = len(items) > 2 and items[1] == '*'
+            self.param_list.append(ParamSpec(items[-1], param_type, requisite, content))
+            for error_code, description in param_type.codes():
+                self.__code_set(error_code, description, 'type')
+        else:
+            self.fields[name] = content
+
+
+def parse_doc_string(doc_string, render=rst_to_html):
+    """ Parse view's doc string to plain data by docutils, it can be json serialized
+
+    {
+        title: ['rst source', ...],
+        description: ['rst source', ...],
+        fields: [[field_name, field_content_html], ...]
+    }
+    """
+    import docutils.nodes
+    from docutils.core import publish_doctree
+
+    doc = {'title': [], 'description': None, 'fields': []}
+
+    def parse_doc_tree(doc_tree):
+        if type(doc_tree) == docutils.nodes.term:
+            doc['title'] = [doc_tree.rawsource]
+            return
+
+        if type(doc_tree) == docutils.nodes.paragraph:
+            if doc['description'] is None:
+                doc['title'].append(doc_tree.rawsource)
+                doc['description'] = []
             else:
-                self.param_allow_null.append(items[-1])
-            self.param_list.append(param)
-            self.param_dict[items[-1]] = param
-            self.param_default[items[-1]] = None
-            self.param_types[items[-1]] = param_type
-            if isinstance(param['type'], List):
-                self.__code_set(param_type.type.error_code, param_type.type.description, 'type')
-                self.__code_set(param_type.error_code,
-                                        param_type.description % param_type.type.__name__, 'type')
-            elif param['type'] != Param:
-                self.__code_set(param_type.error_code, param_type.description, 'type')
+                doc['description'].append(doc_tree.rawsource)
+            return
+
+        if type(doc_tree) == docutils.nodes.field:
+            doc['fields'].append([doc_tree.children[0].astext(), render(doc_tree.children[1].rawsource)])
+            return
+
+        for item in doc_tree.children:
+            parse_doc_tree(item)
+
+    parse_doc_tree(publish_doctree(doc_string))
+    doc['description'] = doc['description'] or []
+    return doc
+
+
+doc_field_re = re.compile(r'^:([^:]+):(.*)$')
+
+
+def parse_doc_string_light(doc_string):
+    """ Parse view's doc string without docutils, the result is same as parse_doc_string
+
+    Only paragraphs and field list (``:name: content``) are recognized, field content is kept as plain text.
+    """
+    doc = {'title': [], 'description': [], 'fields': []}
+    field = None
+    paragraph = []
+
+    def end_paragraph():
+        if paragraph:
+            if doc['title']:
+                doc['description'].append(os.linesep.join(paragraph))
+            else:
+                doc['title'].append(os.linesep.join(paragraph))
+            del paragraph[:]
+
+    for line in cleandoc(doc_string).splitlines():
+        matched = doc_field_re.match(line)
+        if matched:
+            end_paragraph()
+            field = [matched.group(1).strip(), matched.group(2).strip()]
+            doc['fields'].append(field)
+        elif not line.strip():
+            end_paragraph()
+            field = None
+        elif field is not None and line[:1].isspace():
+            field[1] = (field[1] + os.linesep + line.strip()).strip()   # field content continuation line
         else:
-            setattr(self, name, content)
+            field = None
+            paragraph.append(line.strip())
+    end_paragraph()
+    return doc
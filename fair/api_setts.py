@@ -1,10 +1,16 @@
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint
 
 from .parameter import get_parameter_types
-from .response import JsonRaise
+from .response import JsonRaise, JsonStreamRaise
 from .execute import CaseLocalStorage
+from .meta_cache import MetaCache
+from .serializer import get_serializers
+from .stats import Stats
+from .cache import MemoryCache, FileCache
+from .startup import get_startup_profiler
 
 log = logging.getLogger(__name__)
 
@@ -18,31 +24,75 @@ class Setts(object):
             },
             url_2: ...
         }
+
+        dispatch_map define {
+            (url_1, http_method_1): view_func_1,
+            (url_1, http_method_2): view_func_1,
+            ...
+        }
     """
 
-    def __init__(self, app, case_storage=None):
-        from .plugin import jsonp
+    def __init__(self, app, case_storage=None, meta_cache=None, doc_parser='docutils', serializer='json',
+                 stats=False, batch=None, batch_workers=0, cache_backend=MemoryCache):
+        from .plugin import jsonp, rate_limit, compress
         self.app = app
 
         self.url_map = dict()
 
-        self.plugins = {'json_p': jsonp.JsonP('callback')}
+        self.dispatch_map = dict()                          # (url, http method) -> view_func
+
+        self.ui_pages = dict()                              # rendered doc/exe ui pages, see ui.cache.cached_page
 
-        self.responses = {'default': JsonRaise}
+        self.plugins = {'json_p': jsonp.JsonP('callback'), 'compress': compress.Compress()}
+        if rate_limit.fcntl:
+            self.plugins['rate_limit'] = rate_limit.RateLimit()
+
+        self.responses = {'default': JsonRaise, 'json_stream': JsonStreamRaise}
 
         self.parameter_types = get_parameter_types()
 
+        self.serializers = get_serializers()                # name -> function(data) return json bytes
+        self.dumps = None
+        self.set_serializer(serializer)
+
         self.case_storage = case_storage                    # 执行（测试）案例存储
 
+        self.meta_cache = MetaCache(meta_cache) if meta_cache else None     # parsed doc string cache directory
+
+        self.doc_parser = doc_parser                        # 'docutils' or 'light' (docutils is not imported)
+
+        self.stats = Stats() if stats else None             # request phase timings, served by url + '__stats'
+
+        if cache_backend is FileCache:
+            raise Exception('FileCache need a directory, use cache_backend=functools.partial(FileCache, path)')
+        self.cache_backend = cache_backend                  # response cache factory, used by view's :cache: field
+
+        self.startup_profiler = get_startup_profiler()      # enabled by env FAIR_STARTUP_REPORT
+        if self.startup_profiler and doc_parser != 'light':
+            self.startup_profiler.preload_docutils()
+
+        self.batch = batch                                  # batch api url, e.g. '/__batch'
+        self.batch_executor = ThreadPoolExecutor(batch_workers) if batch_workers else None
+
     def register_blueprint(self):
         templates_path = os.path.realpath(os.path.join(__file__, '..', 'ui'))
         fair_ui = Blueprint('fair_ui', __name__, template_folder=templates_path)
         self.app.register_blueprint(fair_ui)
 
+    def set_serializer(self, name):
+        if name not in self.serializers:
+            raise Exception('json serializer %s not defined (or not installed), support: %s'
+                            % (name, ', '.join(self.serializers)))
+        self.dumps = self.serializers[name]
+
     def register_url_map(self, url, view_func, http_methods):
         if url not in self.url_map:
             self.url_map[url] = dict()
         self.url_map[url][view_func] = http_methods
+        for http_method in http_methods:
+            # the first registered view keep the method, same as url_map's iteration order
+            self.dispatch_map.setdefault((url, http_method), view_func)
+        self.ui_pages.clear()
 
     def register_case_storage(app, case_storage=CaseLocalStorage, **params):
         """ cache_path
@@ -1,12 +1,18 @@
+import logging
+from functools import partial
 from flask import Flask, request
 
 from .api_setts import Setts
 from .api_meta import Meta
 from .ui.doc import doc_ui
 from .ui.exe import exe_ui
+from .ui.stats import stats_ui
 from flask import Response
-from .response import ResponseRaise
-from .utility import get_request_params, structure_params
+from .response import ResponseRaise, current_meta
+from .utility import get_request_params, run_coroutine, params_key
+from .batch import batch_api
+
+log = logging.getLogger(__name__)
 
 
 class Fair(Flask):
@@ -17,7 +23,12 @@ class Fair(Flask):
         super(Fair, self).__init__(import_name, **kwargs)
 
         self.api = api or Setts(self)                         # type: Setts
+        self.api.app = self
         self.api.register_blueprint()
+        if self.api.batch:
+            self.add_url_rule(self.api.batch, 'FAIR BATCH', batch_api, methods=['POST'])
+        if self.api.startup_profiler:
+            self.before_request(self.api.startup_profiler.on_request)
 
     def route(self, rule=None, **options):
 
@@ -43,62 +54,123 @@ class Fair(Flask):
         return response
 
     def api_decorator(self, view_func, rule=None, **options):
+        profiler = self.api.startup_profiler
+        add_url_rule = profiler.wrap(rule, 'add_url_rule', self.add_url_rule) if profiler else self.add_url_rule
 
         http_methods = self.api_http_method(options)
 
         if rule not in self.api.url_map:
-            self.add_url_rule(rule + '__doc', rule + ' DOC', doc_ui)
-            self.add_url_rule(rule + '__exe', rule + ' EXE', exe_ui)
+            add_url_rule(rule + '__doc', rule + ' DOC', doc_ui)
+            add_url_rule(rule + '__exe', rule + ' EXE', exe_ui)
+            if self.api.stats:
+                add_url_rule(rule + '__stats', rule + ' STATS', stats_ui)
         rule = self.api_rule(view_func, http_methods, rule=rule)
 
         endpoint = self.api_endpoint(rule, http_methods, options)
 
-        self.add_url_rule(rule, endpoint, view_func, **options)
+        add_url_rule(rule, endpoint, view_func, **options)
 
         view_func.meta = Meta(self.api, view_func, rule, http_methods)
 
     def is_api(self):
         """ keep it simple for performance """
-        from flask import request
-        if request.path in self.api.url_map:
-            for view_func, methods in self.api.url_map[request.path].items():
-                if request.method in methods:
-                    return True
-        return False
+        request.view_func = self.api.dispatch_map.get((request.path, request.method))
+        return request.view_func is not None
 
     def api_adapter(self):
-        view_func = None
-        views = self.api.url_map.get(request.path)
-
-        for view, support_methods in views.items():
-            if request.method in support_methods:
-                view_func = view
-                break
+        view_func = request.view_func
 
         if not hasattr(view_func, 'meta'):
             return Response('406 Current url not have Fair UI', status=406)
 
+        meta = view_func.meta
+        timer = meta.stats.timer() if meta.stats else None
+        request.meta = meta
+        response_content = self.api_execute(view_func, get_request_params, timer)
+        if isinstance(response_content, ResponseRaise):
+            try:
+                response_content = response_content.response()
+            except Exception:
+                log.exception('%s response failed', request.path)
+                response_content = meta.response('exception').response()
+        if meta.after_request_hooks:
+            response_content = self.make_response(response_content)
+            for after_request in meta.after_request_hooks:
+                response_content = after_request(meta, response_content)
+        if timer:
+            timer.end()
+        return response_content
+
+    @staticmethod
+    def api_execute(view_func, get_params, timer=None):
+        """ run api's plugins, parameters structure and view
+
+        :param view_func: api view
+        :param get_params: function return request parameters (utility.RequestParams)
+        :param timer: stats.PhaseTimer or None
+        :return: view's return, generally ResponseRaise
+        """
+        meta = view_func.meta
+        token = current_meta.set(meta)
         try:
-            request.meta = view_func.meta
             # get request parameters
-            params = get_request_params()
-            params_proto = params.copy()
+            params = get_params()
+            if timer:
+                timer.lap()
 
             # plugin
-            for plugin in view_func.meta.plugins:
-                plugin.before_request(view_func.meta, params)
-                for parameter in plugin.parameters:
-                    del params[parameter[0]]
+            for before_request in meta.before_request_hooks:
+                before_request(meta, params)
+            if meta.plugin_params:
+                params.consume(*meta.plugin_params)
+            if timer:
+                timer.lap()
 
             # structure parameters
-            params = structure_params(view_func, params_proto, params)
+            params = meta.structure_params(params.source, params)
+            if timer:
+                timer.lap()
+
+            # response cache
+            key = params_key(params) if meta.cache or meta.single_flight else None
+            if meta.cache:
+                response_content = meta.cache.load(meta, key)
+                if response_content is not None:
+                    if timer:
+                        timer.lap()
+                    return response_content
+
+            if meta.single_flight:
+                # concurrent identical calls wait for the first one and share its response
+                response_content = meta.single_flight.do(key, partial(Fair.api_call_view, view_func, params, key))
+            else:
+                response_content = Fair.api_call_view(view_func, params, key)
+            if timer:
+                timer.lap()
+            return response_content
+        except ResponseRaise as response_raise:
+            if timer:
+                timer.lap()                 # the phase raised response
+            return response_raise
+        except Exception:
+            log.exception('%s %s', meta.rule, 'Unknown exception')
+            return meta.response('exception')
+        finally:
+            current_meta.reset(token)      # ResponseRaise out of an api call does not use this meta
+
+    @staticmethod
+    def api_call_view(view_func, params, cache_key=None):
+        """ call view with structured parameters, return the response (ResponseRaise raised by view is returned)
+        """
+        meta = view_func.meta
+        try:
             response_content = view_func(**params)
-            if isinstance(response_content, ResponseRaise):
-                response_content = response_content.response()
+            if meta.is_coroutine:
+                response_content = run_coroutine(response_content)
         except ResponseRaise as response_raise:
-            response_content = response_raise.response()
-        except Exception as e:
-            response_content = view_func.meta.response('exception').response()
+            response_content = response_raise
+        if meta.cache:
+            response_content = meta.cache.save(meta, cache_key, response_content)
         return response_content
 
     def api_rule(self, view_func, http_methods, rule=None):
@@ -0,0 +1,59 @@
+import logging
+from functools import partial
+from flask import request, Response, copy_current_request_context, current_app as app
+
+from .response import ResponseRaise, JSON
+from .utility import RequestParams
+
+log = logging.getLogger(__name__)
+
+
+def batch_api():
+    """ Batch api, execute many api in one http request
+
+    request (application/json): [{"path": "/xxx", "method": "GET", "params": {...}}, ...]
+    response: [{ "code": "", "info": "",  "data": ... }, ...]   same order as the request
+    """
+    items = request.get_json(silent=True)
+    if type(items) is not list:
+        return Response(b'{"code": "batch_invalid", "info": "Batch request must be json list", "data": null}',
+                        content_type=JSON, status=400)
+
+    fair_app = app._get_current_object()
+    executor = fair_app.api.batch_executor
+    if executor and len(items) > 1:
+        # each item runs in a copy of current request context
+        futures = [executor.submit(copy_current_request_context(execute_item), fair_app, item) for item in items]
+        results = [future.result() for future in futures]
+    else:
+        results = [execute_item(fair_app, item) for item in items]
+    return Response(b'[' + b', '.join(results) + b']', content_type=JSON)
+
+
+def execute_item(fair_app, item):
+    """ run one batch item through the same pipeline as Fair.api_adapter, return the json bytes
+    """
+    if type(item) is not dict:
+        return fair_app.api.dumps({'code': 'batch_invalid', 'info': 'Batch item must be json object', 'data': item})
+    path, method, params = item.get('path'), str(item.get('method', 'GET')).upper(), item.get('params')
+    if type(path) is not str or not (params is None or type(params) is dict):
+        return fair_app.api.dumps({'code': 'batch_invalid', 'info': 'Batch item path must be string, params object',
+                                   'data': item})
+    view_func = fair_app.api.dispatch_map.get((path, method))
+    if not hasattr(view_func, 'meta'):
+        return fair_app.api.dumps({'code': 'api_not_found', 'info': 'Api not found',
+                                   'data': {'path': path, 'method': method}})
+
+    meta = view_func.meta
+    timer = meta.stats.timer() if meta.stats else None
+    response_content = fair_app.api_execute(view_func, partial(RequestParams, params or {}), timer)
+    if not isinstance(response_content, ResponseRaise):
+        response_content = meta.response('exception')
+    try:
+        content = response_content.encode()
+    except Exception:
+        log.exception('%s %s batch response failed', path, method)
+        content = meta.response('exception').encode()
+    if timer:
+        timer.end()
+    return content
@@ -0,0 +1,287 @@
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from flask import Response
+
+from .response import ResponseRaise, JsonRaise, JSON
+
+log = logging.getLogger(__name__)
+
+CACHE_OPTIONS = ('ttl', 'max', 'bytes')
+
+
+class CacheDefineError(Exception):
+    """ Invalid ``:cache:`` / ``:single_flight:`` field, raised at route definition """
+
+
+def parse_cache_options(rule, content):
+    """ ``ttl=30 max=10000`` -> {'ttl': 30, 'max': 10000} """
+    options = {}
+    for item in content.split():
+        key, _, value = item.partition('=')
+        if key not in CACHE_OPTIONS or not value.isdigit():
+            raise CacheDefineError('Error define in %s: invalid cache option %r, support %s=<int>' %
+                                   (rule, item, '/'.join(CACHE_OPTIONS)))
+        options[key] = int(value)
+    return options
+
+
+class CachedRaise(ResponseRaise):
+    """ Response from cache, content is the encoded json """
+
+    def __init__(self, code, content, status=None, meta=None, cache=None, key=None):
+        super(CachedRaise, self).__init__(code, status=status, meta=meta)
+        self.content = content
+        self.cache = cache
+        self.key = key
+
+    def encode(self):
+        return self.content
+
+    def response(self):
+        response = Response(self.content, content_type=JSON, status=self.status)
+        response.cached_content = self.content          # plugins (e.g. compress) can reuse works on the content
+        response.response_cache = (self.cache, self.key)    # and keep it in the entry, see ResponseCache.set_variant
+        return response
+
+
+class ResponseCache(object):
+    """ API response cache parent class, defined by view's doc string ``:cache: ttl=30 max=10000 bytes=...``
+
+    Only success response of GET api is cached, key is the structured parameters (utility.params_key).
+
+    :param ttl: seconds
+    :param max: max entries
+    :param bytes: max content bytes, 0 is not limit
+    """
+
+    def __init__(self, ttl=30, max=10000, bytes=0):
+        self.ttl = ttl
+        self.max = max
+        self.max_bytes = bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, meta, key):
+        """ return CachedRaise or None """
+        item = self.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        code, status, content = item
+        return CachedRaise(code, content, status=status, meta=meta, cache=self, key=key)
+
+    def save(self, meta, key, response_raise):
+        """ cache the response, return CachedRaise (content already encoded) or the response unchanged """
+        if type(response_raise) is not JsonRaise or response_raise.code != 'success':
+            return response_raise                       # JsonStreamRaise ... is not cached
+        content = response_raise.encode()
+        self.set(key, (response_raise.code, response_raise.status, content))
+        return CachedRaise(response_raise.code, content, status=response_raise.status, meta=meta, cache=self, key=key)
+
+    def get(self, key):
+        raise NotImplementedError()
+
+    def set(self, key, item):
+        raise NotImplementedError()
+
+    def get_variant(self, key, name, content):
+        """ variant (e.g. compressed body) of the entry's content, None if not kept """
+        return None
+
+    def set_variant(self, key, name, content, data):
+        """ keep a variant with the entry, it is dropped with the entry (and counted in bytes) """
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class MemoryCache(ResponseCache):
+    """ In-process LRU cache with TTL """
+
+    def __init__(self, ttl=30, max=10000, bytes=0):
+        super(MemoryCache, self).__init__(ttl, max, bytes)
+        self.items = OrderedDict()              # key -> (expires, (code, status, content), {variant: data})
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is None:
+                return None
+            if value[0] < time.monotonic():
+                self.__remove(key)
+                return None
+            self.items.move_to_end(key)
+            return value[1]
+
+    def set(self, key, item):
+        with self.lock:
+            if key in self.items:
+                self.__remove(key)
+            self.items[key] = (time.monotonic() + self.ttl, item, {})
+            self.size += len(item[2])
+            self.__evict()
+
+    def get_variant(self, key, name, content):
+        value = self.items.get(key)
+        if value is not None and value[1][2] is content:
+            return value[2].get(name)
+        return None
+
+    def set_variant(self, key, name, content, data):
+        with self.lock:
+            value = self.items.get(key)
+            if value is None or value[1][2] is not content or name in value[2]:
+                return                          # the entry is evicted or replaced
+            value[2][name] = data
+            self.size += len(data)
+            self.__evict()
+
+    def __evict(self):
+        while len(self.items) > self.max or (self.max_bytes and self.size > self.max_bytes):
+            self.__remove(next(iter(self.items)))
+            self.evictions += 1
+
+    def __remove(self, key):
+        value = self.items.pop(key)
+        self.size -= len(value[1][2]) + sum(len(data) for data in value[2].values())
+
+    def stats(self):
+        stats = super(MemoryCache, self).stats()
+        stats.update(entries=len(self.items), bytes=self.size)
+        return stats
+
+
+class FileCache(ResponseCache):
+    """ Local file cache, shared by workers in the same host
+
+    One file per key: first line is ``expires status code``, then the content.
+    A variant is the file ``<key file>.<name>``: first line is ``expires sha1(content)``, then the data.
+    The directory is required, set it by a factory: ``Setts(cache_backend=partial(FileCache, path))``.
+    Views share the directory, each view keeps its files in the sub directory named by the hash of its rule.
+    Expired and over limit files (variants too) of the view are cleaned every ``max // 10`` saves.
+    """
+
+    def __init__(self, path, ttl=30, max=10000, bytes=0):
+        super(FileCache, self).__init__(ttl, max, bytes)
+        self.path = os.path.realpath(path)
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        self.saves = 0
+        self.entries = 0
+        self.size = 0
+
+    def load(self, meta, key):
+        return super(FileCache, self).load(meta, (meta.rule, key))
+
+    def save(self, meta, key, response_raise):
+        return super(FileCache, self).save(meta, (meta.rule, key), response_raise)
+
+    def get_view_path(self, rule):
+        return os.path.join(self.path, hashlib.sha1(rule.encode()).hexdigest()[:16])
+
+    def get_file_path(self, key):
+        """ key is (rule, params key) """
+        rule, key = key
+        return os.path.join(self.get_view_path(rule), hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self.get_file_path(key), 'rb') as cache_file:
+                header = cache_file.readline().split()
+                if float(header[0]) < time.time():
+                    return None
+                return header[2].decode(), int(header[1]) if header[1] != b'-' else None, cache_file.read()
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def set(self, key, item):
+        code, status, content = item
+        header = '%f %s %s\n' % (time.time() + self.ttl, status or '-', code)
+        if self.write(self.get_file_path(key), header.encode() + content):
+            self.saved(key[0])
+
+    def get_variant(self, key, name, content):
+        try:
+            with open(self.get_file_path(key) + '.' + name, 'rb') as variant_file:
+                header = variant_file.readline().split()
+                if float(header[0]) < time.time() or header[1].decode() != hashlib.sha1(content).hexdigest():
+                    return None                 # the entry is replaced after the variant saved
+                return variant_file.read()
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def set_variant(self, key, name, content, data):
+        header = '%f %s\n' % (time.time() + self.ttl, hashlib.sha1(content).hexdigest())
+        if self.write(self.get_file_path(key) + '.' + name, header.encode() + data):
+            self.saved(key[0])
+
+    def write(self, file_path, data):
+        try:
+            dir_path = os.path.dirname(file_path)
+            if not os.path.isdir(dir_path):
+                os.makedirs(dir_path, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as cache_file:
+                cache_file.write(data)
+            os.replace(temp_path, file_path)
+        except OSError:
+            log.exception('response cache save failed')
+            return False
+        return True
+
+    def saved(self, rule):
+        self.saves += 1
+        if self.saves % max(self.max // 10, 1) == 0:
+            self.clean(rule)
+
+    def clean(self, rule):
+        """ clean the view's files, the limits and the stats are per view """
+        now = time.time()
+        files = []
+        view_path = self.get_view_path(rule)
+        try:
+            names = os.listdir(view_path)
+        except OSError:
+            names = []
+        for name in names:
+            if name.endswith('.tmp'):
+                continue                        # being written
+            file_path = os.path.join(view_path, name)
+            try:
+                stat = os.stat(file_path)
+                with open(file_path, 'rb') as cache_file:
+                    expires = float(cache_file.readline().split()[0])
+            except (OSError, ValueError, IndexError):
+                continue
+            if expires < now:
+                self.__remove(file_path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, file_path))
+        files.sort()
+        size = sum(item[1] for item in files)
+        while files and (len(files) > self.max or (self.max_bytes and size > self.max_bytes)):
+            mtime, file_size, file_path = files.pop(0)
+            self.__remove(file_path)
+            size -= file_size
+        self.entries, self.size = len(files), size
+
+    def __remove(self, file_path):
+        try:
+            os.remove(file_path)
+            self.evictions += 1
+        except OSError:
+            pass
+
+    def stats(self):
+        stats = super(FileCache, self).stats()
+        stats.update(entries=self.entries, bytes=self.size)
+        return stats
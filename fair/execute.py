@@ -1,8 +1,17 @@
 import os
 import json
+import sqlite3
+import hashlib
+import atexit
+import threading
+from queue import Queue
+from collections import OrderedDict
+import logging
 from flask import request
 from fair.utility import text_to_html
 
+log = logging.getLogger(__name__)
+
 
 class CaseStorage(object):
 
@@ -15,6 +24,22 @@ class CaseStorage(object):
     def save_config(self, api_path, method, post_type, json_p, params):
         raise NotImplementedError
 
+    def load_config(self, api_path, method):
+        """ api's saved config dict """
+        raise NotImplementedError
+
+    def load_cases(self, api_path, method):
+        """ api's saved cases: {code: [{'param_mode': 'xx', 'params': {...}}, ...]} """
+        raise NotImplementedError
+
+    def iter_cases(self):
+        """ all cases: (api_path, method, code, param_mode, params) """
+        raise NotImplementedError
+
+    def modified(self, api_path, method):
+        """ stamp changed when the api's cases or config changed on storage, None if unknown """
+        return None
+
     @staticmethod
     def params_not_equal(old_params, new_params):
         for param in old_params:
@@ -69,9 +94,12 @@ class CaseLocalStorage(CaseStorage):
         return '[%s]' % use_cases
 
 
-    def get_case_dir(self, api_uri, method_name):
+    def case_dir(self, api_uri, method_name):
         api_path = '_'.join(api_uri[1:].split('/'))
-        case_dir = os.path.realpath(os.path.join(self.workspace, 'exe_ui', api_path, method_name))
+        return os.path.realpath(os.path.join(self.workspace, 'exe_ui', api_path, method_name))
+
+    def get_case_dir(self, api_uri, method_name):
+        case_dir = self.case_dir(api_uri, method_name)
         if not os.path.exists(case_dir):
             os.makedirs(case_dir)
         return case_dir
@@ -109,6 +137,32 @@ class CaseLocalStorage(CaseStorage):
         data_file.close()
         return {'result': 'success'}
 
+    def load_config(self, api_path, method):
+        config_path = os.path.join(self.case_dir(api_path, method), '__config__')
+        if not os.path.exists(config_path):
+            return {}
+        with open(config_path, 'r') as config:
+            return json.load(config)
+
+    def load_cases(self, api_path, method):
+        cases = {}
+        case_dir = self.case_dir(api_path, method)
+        if not os.path.isdir(case_dir):
+            return cases
+        for code in os.listdir(case_dir):
+            if code == '__config__':
+                continue
+            with open(os.path.join(case_dir, code), 'r') as data_file:
+                cases[code] = [json.loads(line) for line in data_file if line.strip()]
+        return cases
+
+    def modified(self, api_path, method):
+        # files are rewritten in place, so the directory's own mtime is not enough
+        case_dir = self.case_dir(api_path, method)
+        if not os.path.isdir(case_dir):
+            return 0
+        return max([os.stat(case_dir).st_mtime_ns] + [entry.stat().st_mtime_ns for entry in os.scandir(case_dir)])
+
     def get_sorted_code(self, view, method):
         codes = []
         is_param_type = False
@@ -127,3 +181,243 @@ class CaseLocalStorage(CaseStorage):
                           self.get_exe_case(view, method, error_code)))
 
         return codes
+
+
+class CaseSqliteStorage(CaseStorage):
+    """ Case storage in a single SQLite database
+
+    Cases are keyed by (api_path, method, code) with the params hash for dedup, the latest ``keep`` are kept.
+    Save is one insert (replace the same params), loading an api's cases is one query.
+    Each thread has its own connection, WAL journal let the workers read while one is writing.
+    A connection is not used across fork (e.g. gunicorn --preload), the forked process connects again.
+    """
+
+    def __init__(self, path, keep=10):
+        self.path = os.path.realpath(path)
+        self.keep = keep
+        self.local = threading.local()
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS cases ('
+                                   'id INTEGER PRIMARY KEY AUTOINCREMENT, api_path TEXT, method TEXT, code TEXT, '
+                                   'params_hash TEXT, param_mode TEXT, params TEXT, '    # json of param_mode and params
+                                   'UNIQUE (api_path, method, code, params_hash))')
+                connection.execute('CREATE TABLE IF NOT EXISTS configs ('
+                                   'api_path TEXT, method TEXT, config TEXT, PRIMARY KEY (api_path, method))')
+        finally:
+            connection.close()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def get_connection(self):
+        pid = os.getpid()
+        if getattr(self.local, 'pid', None) != pid:
+            # the parent's connection (if any) is left as is, closing it in the child could break the parent
+            self.local.connection = self.connect()
+            self.local.pid = pid
+        return self.local.connection
+
+    @staticmethod
+    def params_hash(param_mode, params):
+        return hashlib.sha1(json.dumps([param_mode, params], sort_keys=True).encode()).hexdigest()
+
+    def get_case(self, api_path, method):
+        """ {'api_config': {...}, 'cases': {code: [{'param_mode': 'xx', 'params': {...}}, ...]}} """
+        return {'api_config': self.load_config(api_path, method), 'cases': self.load_cases(api_path, method)}
+
+    def load_config(self, api_path, method):
+        row = self.get_connection().execute('SELECT config FROM configs WHERE api_path = ? AND method = ?',
+                                            (api_path, method)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def load_cases(self, api_path, method):
+        cases = {}
+        for code, param_mode, params in self.get_connection().execute(
+                'SELECT code, param_mode, params FROM cases WHERE api_path = ? AND method = ? ORDER BY id',
+                (api_path, method)):
+            cases.setdefault(code, []).append({'param_mode': json.loads(param_mode), 'params': json.loads(params)})
+        return cases
+
+    def modified(self, api_path, method):
+        # commits land in the -wal file first, the main file changes on checkpoint
+        return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+                     for path in (self.path, self.path + '-wal'))
+
+    def get_exe_case(self, api_path, method, code):
+        rows = self.get_connection().execute(
+            'SELECT param_mode, params FROM cases WHERE api_path = ? AND method = ? AND code = ? ORDER BY id',
+            (api_path, method, code))
+        return json.dumps([{'param_mode': json.loads(param_mode), 'params': json.loads(params)}
+                           for param_mode, params in rows])
+
+    def iter_cases(self):
+        """ all cases: (api_path, method, code, param_mode, params) """
+        for api_path, method, code, param_mode, params in self.get_connection().execute(
+                'SELECT api_path, method, code, param_mode, params FROM cases ORDER BY id'):
+            yield api_path, method, code, json.loads(param_mode), json.loads(params)
+
+    def save_case(self, api_path, method, param_mode, params, code):
+        connection = self.get_connection()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO cases (api_path, method, code, params_hash, param_mode, params) '
+                               'VALUES (?, ?, ?, ?, ?, ?)', (api_path, method, code,
+                                                             self.params_hash(param_mode, params),
+                                                             json.dumps(param_mode), json.dumps(params)))
+            # save the latest records
+            connection.execute('DELETE FROM cases WHERE api_path = ? AND method = ? AND code = ? AND id NOT IN ('
+                               'SELECT id FROM cases WHERE api_path = ? AND method = ? AND code = ? '
+                               'ORDER BY id DESC LIMIT ?)', (api_path, method, code) * 2 + (self.keep,))
+        return {'result': 'success'}
+
+    def save_config(self, api_path, method, post_type, json_p, params):
+        connection = self.get_connection()
+        config = json.dumps({'method': method, 'post_type': post_type, 'json_p': json_p, 'params': params})
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO configs (api_path, method, config) VALUES (?, ?, ?)',
+                               (api_path, method, config))
+        return {'result': 'success'}
+
+
+class CaseCacheStorage(CaseStorage):
+    """ In-memory cache in front of another case storage
+
+    Cases and configs are kept per api in a LRU, saves update the memory at once and are written to the
+    underlying storage by a background thread. An entry is reloaded when the storage's ``modified`` stamp
+    changed (another worker wrote it), except while it still has writes waiting to be flushed.
+    """
+
+    def __init__(self, storage, max_size=256, keep=10):
+        self.storage = storage                                  # type: CaseStorage
+        self.max_size = max_size
+        self.keep = keep
+        self.entries = OrderedDict()                            # (api_path, method) -> [stamp, config, cases]
+        self.pending = {}                                       # (api_path, method) -> [writes not flushed, stamp]
+        self.lock = threading.Lock()
+        self.queue = Queue()
+        self.writer = None
+
+    def entry(self, api_path, method):
+        key = (api_path, method)
+        with self.lock:
+            entry = self.entries.get(key)
+            pending = key in self.pending
+        # storage I/O is out of the lock
+        if entry is not None and (pending or entry[0] == self.storage.modified(api_path, method)):
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+            return entry
+        stamp = self.storage.modified(api_path, method)
+        entry = [stamp, self.storage.load_config(api_path, method), self.storage.load_cases(api_path, method)]
+        with self.lock:
+            if key in self.pending:
+                return self.entries[key]                        # saved while loading, memory is newer
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self.evict()
+        return entry
+
+    def evict(self):
+        """ drop the least recently used entries, except the ones with pending writes (called with the lock) """
+        for key in list(self.entries):
+            if len(self.entries) <= self.max_size:
+                break
+            if key not in self.pending:
+                del self.entries[key]
+
+    def get_case(self, api_path, method):
+        """ {'api_config': {...}, 'cases': {code: [{'param_mode': 'xx', 'params': {...}}, ...]}} """
+        entry = self.entry(api_path, method)
+        return {'api_config': entry[1], 'cases': entry[2]}
+
+    def get_exe_case(self, api_path, method, code):
+        return json.dumps(self.entry(api_path, method)[2].get(code, []))
+
+    def load_config(self, api_path, method):
+        return self.entry(api_path, method)[1]
+
+    def load_cases(self, api_path, method):
+        return self.entry(api_path, method)[2]
+
+    def iter_cases(self):
+        self.flush()
+        return self.storage.iter_cases()
+
+    def modified(self, api_path, method):
+        return self.storage.modified(api_path, method)
+
+    def save_case(self, api_path, method, param_mode, params, code):
+        entry = self.entry(api_path, method)
+        case = {'param_mode': param_mode, 'params': params}
+        with self.lock:
+            entry = self.keep_entry((api_path, method), entry)
+            cases = [item for item in entry[2].get(code, []) if item != case]
+            cases.append(case)
+            entry[2] = dict(entry[2], **{code: cases[-self.keep:]})
+            self.write((api_path, method), self.storage.save_case, (api_path, method, param_mode, params, code))
+        return {'result': 'success'}
+
+    def save_config(self, api_path, method, post_type, json_p, params):
+        entry = self.entry(api_path, method)
+        with self.lock:
+            entry = self.keep_entry((api_path, method), entry)
+            entry[1] = {'method': method, 'post_type': post_type, 'json_p': json_p, 'params': params}
+            self.write((api_path, method), self.storage.save_config, (api_path, method, post_type, json_p, params))
+        return {'result': 'success'}
+
+    def keep_entry(self, key, entry):
+        """ the entry to save in, it is kept in the LRU until the write flushed (called with the lock) """
+        entry = self.entries.get(key, entry)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        return entry
+
+    def write(self, key, func, args):
+        """ queue a write for the background thread, called with the lock held """
+        if key not in self.pending:
+            self.pending[key] = [0, self.entries[key][0]]       # the stamp memory is coherent with
+        self.pending[key][0] += 1
+        self.queue.put((key, func, args))
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_behind, name='fair-case-writer', daemon=True)
+            self.writer.start()
+            atexit.register(self.flush)
+
+    def write_behind(self):
+        while True:
+            writes = [self.queue.get()]
+            while not self.queue.empty():
+                writes.append(self.queue.get())
+            keys = set(key for key, func, args in writes)
+            before = {key: self.storage.modified(*key) for key in keys}
+            for key, func, args in writes:
+                try:
+                    func(*args)
+                except Exception:
+                    log.exception('save case %s %s failed', *key)
+            after = {key: self.storage.modified(*key) for key in keys}
+            with self.lock:
+                for key in keys:
+                    pending = self.pending[key]
+                    # the new stamp is ours only if no other worker wrote since the memory was coherent,
+                    # else None let the entry reload
+                    pending[1] = after[key] if before[key] == pending[1] else None
+                for key, func, args in writes:
+                    pending = self.pending[key]
+                    pending[0] -= 1
+                    if not pending[0]:
+                        del self.pending[key]
+                        if key in self.entries:
+                            self.entries[key][0] = pending[1]
+                self.evict()
+            for _ in writes:
+                self.queue.task_done()
+
+    def flush(self):
+        """ block until the queued writes reach the underlying storage """
+        self.queue.join()
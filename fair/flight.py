@@ -0,0 +1,53 @@
+import threading
+
+
+class Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ Request coalescing, defined by view's doc string ``:single_flight:``
+
+    Concurrent calls with the same key wait for the first call and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.calls = dict()                 # key -> Call
+        self.lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
+
+    def stats(self):
+        return {'executions': self.executions, 'shared': self.shared, 'in_flight': len(self.calls)}
@@ -0,0 +1,44 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+log = logging.getLogger(__name__)
+
+CACHE_VERSION = '2'
+
+
+class MetaCache(object):
+    """ Parsed doc string disk cache
+
+    Key is the hash of view's doc string, value is the plain data returned by ``api_meta.parse_doc_string``.
+    Parameter types, plugins and responses are resolved from the data each start, so they are not part of the key.
+    Warm start read the cache files only, docutils is not imported.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.realpath(path)
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+    def get_cache_path(self, doc_string):
+        key = hashlib.sha1((CACHE_VERSION + doc_string).encode()).hexdigest()
+        return os.path.join(self.path, key + '.json')
+
+    def get(self, doc_string):
+        try:
+            with open(self.get_cache_path(doc_string), 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, doc_string, doc):
+        # write to a temp file then rename, other workers never read a half written file
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(doc, cache_file)
+            os.replace(temp_path, self.get_cache_path(doc_string))
+        except OSError:
+            log.exception('meta cache save failed')
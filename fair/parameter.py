@@ -1,4 +1,5 @@
 import re
+from array import array
 from flask import request
 
 
@@ -23,6 +24,103 @@ class Param(object):
         """
         return value
 
+    @classmethod
+    def structure_many(cls, view, values):
+        """Check and conversion every item of values
+
+        :param view:
+        :param list values:
+        :return: list of converted values
+        :raise ItemError: the first invalid item
+        """
+        ret = []
+        for index, value in enumerate(values):
+            try:
+                ret.append(cls.structure(view, value))
+            except Exception:
+                raise ItemError(cls.error_code, {'index': index, 'value': value})
+        return ret
+
+    @classmethod
+    def codes(cls):
+        """ [(error_code, description)] the parameter may respond """
+        if cls is Param:
+            return []
+        return [(cls.error_code, cls.description)]
+
+
+class ItemError(Exception):
+    """ Invalid item (list index or object field) of a parameter, data is added to the response
+    """
+
+    def __init__(self, error_code, data):
+        super(ItemError, self).__init__(error_code, data)
+        self.error_code = error_code
+        self.data = data                    # {'index': 3, 'value': 'x'} or {'path': 'address.city', 'value': 1}
+
+
+class ParamSpec(object):
+    """ Parameter defined by view's doc string (or plugin's parameters)
+
+    param['name'] is same as param.name (compatible with the old dict format)
+    """
+    __slots__ = ('name', 'type', 'requisite', 'description')
+
+    def __init__(self, name, _type, requisite, description):
+        self.name = name
+        self.type = _type
+        self.requisite = requisite
+        self.description = description
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+def get_param_type(name, parameter_types, schemas=()):
+    """ Parameter type by doc string name, e.g. 'Int' -> Int, 'List[Obj[User]]' -> List(Obj(User))
+
+    :param schemas: schemas being compiled, for Obj inside a Schema
+    :return: None if the name (or its sub type) is undefined
+    """
+    if not name.endswith(']'):
+        return parameter_types.get(name)
+    name, _, sub_name = name[:-1].partition('[')
+    param_type = parameter_types.get(name)
+    sub_type = get_param_type(sub_name, parameter_types, schemas)
+    if not param_type or not sub_type or not getattr(param_type, 'has_sub_type', False):
+        return None
+    if issubclass(param_type, Obj):
+        return param_type(sub_type, parameter_types, schemas)
+    if isinstance(sub_type, type) and issubclass(sub_type, Schema):
+        return None                         # Schema is only a sub type of Obj
+    return param_type(sub_type)
+
+
+def structure_items(param_type, view, values):
+    """ structure_many of the parameter type instance (List[List[Int]], List[Obj[User]]) """
+    ret = []
+    for index, value in enumerate(values):
+        try:
+            ret.append(param_type.structure(view, value))
+        except ItemError as e:
+            raise ItemError(e.error_code, item_data('[%d]' % index, e.data))
+        except Exception:
+            raise ItemError(param_type.error_code, {'index': index, 'value': value})
+    return ret
+
+
+def item_data(path, data):
+    """ ItemError's data of the nested item, the item's path is joined to path """
+    if 'path' in data:
+        sub_path = data['path']
+    elif 'index' in data:
+        sub_path = '[%d]' % data['index']
+    else:
+        return data
+    ret = {'path': path + sub_path if sub_path.startswith('[') else path + '.' + sub_path}
+    ret.update((key, value) for key, value in data.items() if key not in ('path', 'index'))
+    return ret
+
 
 def get_parameter_types(parameter_types=None):
     if not parameter_types:
@@ -38,7 +136,7 @@ def get_parameter_types(parameter_types=None):
                 continue
             parameter = getattr(parameter_package, item)
             try:
-                if issubclass(parameter, Param):
+                if issubclass(parameter, (Param, Schema)):
                     if parameter.__name__ not in types:
                         types[parameter.__name__] = parameter
 
@@ -55,7 +153,7 @@ class Str(Param):
 
     @classmethod
     def structure(cls, view, value):
-        if request.json is not None and type(value) is not str:
+        if request.is_json and type(value) is not str:
             raise Exception()
         return value
 
@@ -87,6 +185,7 @@ class Int(Param):
     """
     error_code = 'param_type_error_int'
     description = 'Parameter must be Integer'
+    typecode = 'q'
 
     @classmethod
     def structure(cls, view, value):
@@ -98,6 +197,14 @@ class Int(Param):
         """
         return int(value)
 
+    @classmethod
+    def structure_many(cls, view, values):
+        # json arrays are usually all int already, checking the item types in C is much faster than int() each
+        # (only when structure is not overridden by a subclass, its check must run for every item)
+        if cls.structure.__func__ is Int.structure.__func__ and set(map(type, values)) <= {int}:
+            return list(values)
+        return super(Int, cls).structure_many(view, values)
+
 
 class Float(Param):
     """ Float type parameter
@@ -107,11 +214,22 @@ class Float(Param):
     """
     error_code = 'param_type_error_float'
     description = 'Parameter must be Float'
+    typecode = 'd'
 
     @classmethod
     def structure(cls, view, value):
         return float(value)
 
+    @classmethod
+    def structure_many(cls, view, values):
+        if cls.structure.__func__ is Float.structure.__func__:
+            types = set(map(type, values))
+            if types <= {float}:
+                return list(values)
+            if types <= {float, int}:
+                return list(map(float, values))
+        return super(Float, cls).structure_many(view, values)
+
 
 class List(Param):
     """ List type parameter
@@ -128,19 +246,49 @@ class List(Param):
 
     def __init__(self, _type=None):
         self.type = _type
-        # self.__name__ = 'List[%s]' % _type.__name__
-        self.__name__ = List.__name__
+        self.__name__ = type(self).__name__
 
     def structure(self, view, value):
-
         if type(value) is not list:
-            return self.error_code
+            raise Exception()
         if self.type:
-            for item in value:
-                if item:
-                    error_code = self.type.structure(item)
-                    if error_code:
-                        return error_code
+            return self.type.structure_many(view, value)
+        return value
+
+    def structure_many(self, view, values):
+        return structure_items(self, view, values)
+
+    def codes(self):
+        return self.type.codes() + [(self.error_code, self.description % self.type.__name__)]
+
+
+class Array(List):
+    """ Numeric list parameter, structured to a compact array.array (Array[Int] or Array[Float])
+
+    POST (application/json) only
+
+    :cvar str error_code: Error code
+    :cvar str description: Parameter description
+    """
+    error_code = 'param_type_error_array'
+    description = 'Parameter must be Array[%s]'
+
+    def __init__(self, _type=None):
+        if getattr(_type, 'typecode', None) is None:
+            raise Exception('Array only support numeric type (Int, Float), got %s' % getattr(_type, '__name__', _type))
+        super(Array, self).__init__(_type)
+        # array() checks native numbers itself, only if the type's structure is not overridden
+        self.native = _type.structure.__func__ in (Int.structure.__func__, Float.structure.__func__)
+
+    def structure(self, view, value):
+        if type(value) is not list:
+            raise Exception()
+        if self.native:
+            try:
+                return array(self.type.typecode, value)
+            except (TypeError, OverflowError):
+                pass        # not all items are native numbers, structure them one by one (report the first invalid)
+        return array(self.type.typecode, self.type.structure_many(view, value))
 
 
 class Mail(Param):
@@ -158,3 +306,126 @@ class Mail(Param):
             return cls.code
         if value and not re.match("([^@|\s]+@[^@]+\.[^@|\s]+)", value):
             return cls.code
+
+
+class Schema(object):
+    """ Object schema for ``Obj[...]`` parameter, fields are defined by doc string like view's parameters::
+
+        class User(Schema):
+            ''' User
+
+            :param Str * name: user name
+            :param List[Int] tags: tags
+            :param Obj[Address] address: user address
+            '''
+
+    Add it by ``app.api.parameter_types['User'] = User`` before routes are defined.
+    """
+    description = 'Object'
+
+
+class Obj(Param):
+    """ Object parameter checked by a Schema, e.g. Obj[User]
+
+    POST (application/json) only. The nested schemas are compiled once to a flat plan of field steps,
+    so a request is checked by one loop, not recursive calls on field types.
+
+    :cvar str error_code: Error code
+    :cvar str description: Parameter description
+    """
+    error_code = 'param_type_error_obj'
+    description = 'Parameter must be Object'
+    support = ['POST']
+    has_sub_type = True
+
+    def __init__(self, schema, parameter_types, schemas=()):
+        if not (isinstance(schema, type) and issubclass(schema, Schema)):
+            raise Exception('Obj only support Schema, got %s' % getattr(schema, '__name__', schema))
+        if schema in schemas:
+            raise Exception('Schema %s is recursive' % schema.__name__)
+        self.type = schema
+        self.__name__ = type(self).__name__
+        self.slots = 1                      # slot 0 is the parameter value
+        self.plan = []
+        self.field_codes = []
+        self.compile(parameter_types, schemas + (schema,))
+        self.plan = tuple(self.plan)
+
+    def compile(self, parameter_types, schemas):
+        """ build plan of schema's fields, step: (parent slot, key, path, requisite, slot, keys, structure, error_code)
+
+        An object field gets a slot for its value, and its own plan is inlined with the slots moved.
+        The step with keys (known field names) check the unknown keys of the object in the parent slot.
+        """
+        from .api_meta import parse_doc_string_light
+
+        fields = [name.split()[1:] for name, _ in parse_doc_string_light(self.type.__doc__ or '')['fields']
+                  if name.startswith('param ')]
+        self.plan.append((0, None, '', False, None, frozenset(items[-1] for items in fields), None, None))
+        for items in fields:
+            field_type = get_param_type(items[0], parameter_types, schemas)
+            if not field_type or isinstance(field_type, type) and (issubclass(field_type, Schema) or
+                                                                   field_type.has_sub_type):
+                raise Exception('%s use invalid parameter type %s' % (self.type.__name__, items[0]))
+            key = items[-1]
+            requisite = len(items) > 2 and items[1] == '*'
+            if requisite:
+                self.field_codes.append(('param_missing', 'Missing parameter'))
+            if isinstance(field_type, Obj):
+                offset = self.slots
+                self.slots += field_type.slots
+                self.plan.append((0, key, key, requisite, offset, None, None, field_type.error_code))
+                for parent, sub_key, path, sub_requisite, slot, keys, structure, error_code in field_type.plan:
+                    self.plan.append((parent + offset, sub_key, key + '.' + path if path else key, sub_requisite,
+                                      None if slot is None else slot + offset, keys, structure, error_code))
+                self.field_codes.extend(field_type.codes())
+                continue
+            structure = field_type.structure
+            if getattr(structure, '__func__', None) is Param.structure.__func__:
+                structure = None                        # Param does not limit value, skip the call
+            self.plan.append((0, key, key, requisite, None, None, structure, field_type.error_code))
+            self.field_codes.extend(field_type.codes())
+
+    def structure(self, view, value):
+        if type(value) is not dict:
+            raise Exception()
+        values = [None] * self.slots
+        values[0] = value
+        results = [None] * self.slots
+        results[0] = {}
+        for parent, key, path, requisite, slot, keys, structure, error_code in self.plan:
+            container = values[parent]
+            if container is None:
+                continue                            # the optional object is null
+            if keys is not None:
+                for item in container:
+                    if item not in keys:
+                        raise ItemError('param_unknown', {'path': path + '.' + item if path else item,
+                                                          'value': container[item]})
+                continue
+            item = container.get(key)
+            if item is None:
+                if requisite:
+                    raise ItemError('param_missing', {'path': path})
+                results[parent][key] = None
+            elif slot is not None:
+                if type(item) is not dict:
+                    raise ItemError(error_code, {'path': path, 'value': item})
+                values[slot] = item
+                results[parent][key] = results[slot] = {}
+            elif structure is None:
+                results[parent][key] = item
+            else:
+                try:
+                    results[parent][key] = structure(view, item)
+                except ItemError as e:
+                    raise ItemError(e.error_code, item_data(path, e.data))
+                except Exception:
+                    raise ItemError(error_code, {'path': path, 'value': item})
+        return results[0]
+
+    def structure_many(self, view, values):
+        return structure_items(self, view, values)
+
+    def codes(self):
+        return self.field_codes + [(self.error_code, self.description)]
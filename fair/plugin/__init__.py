@@ -7,17 +7,20 @@ ALLOW_NULL = False
 class Plugin(object):
     """API Plugin parent class.
 
-    :cvar dict codes: error code and message
+    :cvar dict error_codes: error code and message, added to view's Meta.code_list
+    :cvar bool after_request_last: after_request runs after the other plugins' (e.g. content encoding)
     :cvar tuple parameters: e.g. (
             ('parameter1 name', Int, NOT_NULL, 'parameter1 description'),
             ('parameter2 name', Str, ALLOW_NULL, 'parameter2 description')
             ...
         )
     """
-    codes = {}
+    error_codes = {}
 
     parameters = ()
 
+    after_request_last = False
+
     def __init__(self):
         """Plugin init
         """
@@ -27,12 +30,15 @@ class Plugin(object):
         Will be called each request after parameters checked.
         """
 
-    def before_request(self, meta: Meta):
+    def before_request(self, meta: Meta, params):
         """Plugin main method.
-        Will be called each request after parameters checked.
+        Will be called each request before parameters checked.
+        Plugins not override it are not called.
         """
 
-    def after_request(self, meta: Meta):
-        """Plugin main method.
-        Will be called each request after parameters checked.
+    def after_request(self, meta: Meta, response):
+        """Plugin response method.
+        Will be called each request after response created, return the response.
+        Plugins not override it are not called.
         """
+        return response
@@ -0,0 +1,77 @@
+import gzip
+import threading
+from collections import OrderedDict
+from flask import request
+from ..api_meta import Meta
+from ..plugin import Plugin
+
+
+def get_encoders(level):
+    """ content encoding -> function(data) return compressed data, preferred first """
+    encoders = OrderedDict()
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        encoders['br'] = lambda data: brotli.compress(data, quality=min(level, 11))
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        compressor = zstandard.ZstdCompressor(level=level)
+        lock = threading.Lock()             # ZstdCompressor is not thread safe
+
+        def zstd_compress(data):
+            with lock:
+                return compressor.compress(data)
+        encoders['zstd'] = zstd_compress
+    encoders['gzip'] = lambda data: gzip.compress(data, compresslevel=min(level, 9))
+    return encoders
+
+
+class Compress(Plugin):
+    """ Response compression Plugin
+
+    gzip, and brotli / zstd when installed, negotiated by Accept-Encoding.
+    Response smaller than threshold is not compressed.
+    It runs after the other plugins' after_request whatever the order in doc string.
+    Response from cache (:cache:) keeps its compressed bodies in the cache entry, the content is compressed once.
+
+    :param threshold: min bytes to compress
+    :param level: compression level
+    """
+    error_codes = {}
+    after_request_last = True
+
+    def __init__(self, threshold=1024, level=6):
+        super(Compress, self).__init__()
+        self.threshold = threshold
+        self.level = level
+        self.encoders = get_encoders(level)
+        self.encodings = list(self.encoders)
+
+    def after_request(self, meta: Meta, response):
+        if response.is_streamed or response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if not encoding:
+            return response
+        content = response.get_data()
+        if len(content) < self.threshold:
+            return response
+
+        cached_content = getattr(response, 'cached_content', None)
+        if cached_content is not None and cached_content == content:     # not changed by other plugins
+            cache, key = response.response_cache
+            compressed = cache.get_variant(key, encoding, cached_content)
+            if compressed is None:
+                compressed = self.encoders[encoding](content)
+                cache.set_variant(key, encoding, cached_content, compressed)
+        else:
+            compressed = self.encoders[encoding](content)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -1,26 +1,21 @@
-import json
-from flask import Response, request
+import re
+from flask import g
 from ..api_setts import Setts
 from ..api_meta import Meta
 from ..plugin import Plugin
-from ..response import ResponseRaise, JSON_P
+from ..response import JSON_P
 
-
-class JsonPRaise(ResponseRaise):
-    """Json format：{ "code": "", "info": "",  "data": ... } """   # 请勿修改该 doc str，doc_ui 界面要使用
-
-    def response(self):
-        ret = {'code': self.code, 'info': request.meta.code_dict[self.code], 'data': self.data}
-        content = request.meta.json_p_callback_name + '(' + json.dumps(ret) + ')'
-        return self.code, ret, Response(content, content_type=JSON_P, status=self.status)
+CALLBACK_NAME = re.compile(r'[A-Za-z_$][\w$.]*', re.ASCII)
 
 
 class JsonP(Plugin):
     """ JsonP response Plugin
 
     if defined in view's return will using jsonp (accustomed to using 'callback')
+    the callback name is kept in flask.g for the request, after_request wrap the json response with it
+    the callback name must be a js identifier (dots allowed, e.g. ``jQuery.cb``), else json_p_callback_invalid
     """
-    error_codes = {}
+    error_codes = {'json_p_callback_invalid': 'Invalid callback name'}
 
     def __init__(self, callback_field_name):
         super(JsonP, self).__init__()
@@ -32,10 +27,20 @@ class JsonP(Plugin):
 
     def before_request(self, meta: Meta, params):
         if self.callback_field_name in params:
-            meta.json_p_callback_name = params[self.callback_field_name]
-            meta.raise_response = JsonPRaise
+            callback_name = params[self.callback_field_name]
+            if not isinstance(callback_name, str) or not CALLBACK_NAME.fullmatch(callback_name):
+                raise meta.response('json_p_callback_invalid', status=400)
+            g.json_p_callback_name = callback_name
             del params[self.callback_field_name]
             if '_' in params:
                 del params['_']
             if '1_' in params:
                 del params['1_']
+
+    def after_request(self, meta: Meta, response):
+        callback_name = g.pop('json_p_callback_name', None)
+        if callback_name and not response.is_streamed and 'Content-Encoding' not in response.headers:
+            response.set_data(callback_name.encode() + b'(' + response.get_data() + b')')
+            response.content_type = JSON_P
+            response.headers['X-Content-Type-Options'] = 'nosniff'
+        return response
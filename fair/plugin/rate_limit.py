@@ -0,0 +1,88 @@
+import os
+import mmap
+import time
+import struct
+import threading
+from hashlib import blake2b
+from flask import request, current_app
+from ..api_setts import Setts
+from ..api_meta import Meta
+from ..plugin import Plugin
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None                    # not POSIX, RateLimit is not available
+
+SLOT = struct.Struct('<Qdd')        # last key hash, tokens, last update time
+
+
+class RateLimit(Plugin):
+    """ Token bucket rate limit Plugin
+
+    Buckets are kept in a mmap file (fixed size hash table), so all workers of the host share the limit.
+    Each request lock one slot only (fcntl byte range lock), the overhead is constant.
+
+    :param rate: tokens added per second
+    :param burst: bucket capacity
+    :param path: mmap file path, default is ``fair_rate_limit`` in the app's instance folder
+    :param slots: hash table size, keys with the same slot share the bucket (size it above the active keys)
+    :param key_func: function(meta) return the limit key, default is client address + url
+    """
+    error_codes = {'rate_limit_exceeded': 'Too many requests'}
+
+    def __init__(self, rate=10, burst=20, path=None, slots=65536, key_func=None):
+        if fcntl is None:
+            raise Exception('RateLimit need fcntl (POSIX only)')
+        super(RateLimit, self).__init__()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.path = path
+        self.slots = slots
+        self.key_func = key_func or self.default_key
+        self.table = None
+        self.fd = None
+        self.lock = threading.Lock()        # fcntl lock is per process, threads need this one
+
+    @staticmethod
+    def default_key(meta):
+        return '%s %s' % (request.remote_addr, meta.rule)
+
+    def init_view(self, setts: Setts, view_func, rule, http_methods):
+        pass
+
+    def open_table(self):
+        size = self.slots * SLOT.size
+        if not self.path:
+            os.makedirs(current_app.instance_path, mode=0o700, exist_ok=True)
+            self.path = os.path.join(current_app.instance_path, 'fair_rate_limit')
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self.table = mmap.mmap(fd, size)
+        self.fd = fd
+
+    def acquire(self, key):
+        """ take one token of the key's bucket, return False if the bucket is empty """
+        digest = int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little')
+        offset = (digest % self.slots) * SLOT.size
+        with self.lock:
+            if self.table is None:
+                self.open_table()
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, SLOT.size, offset)
+            try:
+                _, tokens, last = SLOT.unpack_from(self.table, offset)
+                now = time.time()
+                # keys with the same slot share the bucket, a new slot (last is 0) refills to burst
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                SLOT.pack_into(self.table, offset, digest, tokens, now)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, SLOT.size, offset)
+        return allowed
+
+    def before_request(self, meta: Meta, params):
+        if not self.acquire(self.key_func(meta)):
+            raise meta.response('rate_limit_exceeded', {'retry_after': 1 / self.rate}, status=429)
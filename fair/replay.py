@@ -0,0 +1,204 @@
+""" Replay the cases saved by the test UI as a load test
+
+    python -m fair.replay STORE --app examples.hello:app [--workers 8] [--rounds 10]
+    python -m fair.replay STORE --url http://127.0.0.1:5000 [--processes] [--requests 10000]
+
+STORE is a CaseSqliteStorage file (.db / .sqlite / .sqlite3) or a CaseLocalStorage workspace.
+With ``--app`` the requests go through the app's WSGI test client in process, with ``--url`` to the server.
+The api list come from the app when given (the local workspace can not list its apis), else from the store.
+
+Reported as json: throughput, per endpoint latency percentiles, code distribution and the count of
+responses whose code differ from the saved case's code.
+"""
+import sys
+import json
+import time
+import argparse
+import importlib
+from urllib.parse import urlsplit, urlencode
+from http.client import HTTPConnection, HTTPSConnection
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .execute import CaseLocalStorage, CaseSqliteStorage
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def load_app(spec):
+    """ 'package.module:app' -> app """
+    module_name, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), name or 'app')
+
+
+def load_store(path):
+    if path.endswith(SQLITE_SUFFIXES):
+        return CaseSqliteStorage(path)
+    return CaseLocalStorage(path)
+
+
+def collect_cases(storage, app=None):
+    """ [(api_path, method, code, post_type, params)] """
+    if app is not None:
+        apis = sorted(app.api.dispatch_map)
+    else:
+        apis = sorted(set((api_path, method) for api_path, method, _, _, _ in storage.iter_cases()))
+    cases = []
+    for api_path, method in apis:
+        post_type = storage.load_config(api_path, method).get('post_type', 'j')
+        for code, items in sorted(storage.load_cases(api_path, method).items()):
+            for item in items:
+                cases.append((api_path, method, code, post_type, item['params']))
+    return cases
+
+
+def request_body(method, post_type, params):
+    """ (query string, body, content type) the same as the test UI send """
+    if method == 'GET':
+        return urlencode(params), None, None
+    if post_type == 'j':
+        return '', json.dumps(params).encode(), 'application/json'
+    return '', urlencode(params).encode(), 'application/x-www-form-urlencoded'
+
+
+def app_sender(spec):
+    client = load_app(spec).test_client()
+
+    def send(api_path, method, post_type, params):
+        query_string, body, content_type = request_body(method, post_type, params)
+        return client.open(api_path, method=method, query_string=query_string, data=body,
+                           content_type=content_type).data
+    return send
+
+
+def url_sender(url):
+    parts = urlsplit(url)
+    connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+    connection = connection_class(parts.netloc, timeout=30)
+    prefix = parts.path.rstrip('/')
+
+    def send(api_path, method, post_type, params):
+        query_string, body, content_type = request_body(method, post_type, params)
+        path = prefix + api_path + ('?' + query_string if query_string else '')
+        try:
+            connection.request(method, path, body=body, headers={'Content-Type': content_type} if content_type else {})
+            return connection.getresponse().read()
+        except Exception:
+            connection.close()          # the next request reconnects
+            raise
+    return send
+
+
+def response_code(content):
+    try:
+        return json.loads(content)['code']
+    except Exception:
+        return '<not json>'
+
+
+def replay_worker(target, jobs):
+    """ run jobs serially, return (elapsed seconds, [(api_path, method, expected code, code, nanosecond)])
+
+    Runs in a thread or a child process, so the target is a ('app', spec) / ('url', url) pair, not a sender.
+    """
+    kind, value = target
+    send = app_sender(value) if kind == 'app' else url_sender(value)
+    samples = []
+    if jobs:
+        try:
+            send(*jobs[0][:2] + jobs[0][3:])    # warm up the connection and lazy init, not measured
+        except Exception:
+            pass                                # reported by the measured requests
+    start = time.perf_counter()
+    for api_path, method, expected, post_type, params in jobs:
+        request_start = time.perf_counter_ns()
+        try:
+            code = response_code(send(api_path, method, post_type, params))
+        except Exception as e:
+            code = '<%s>' % type(e).__name__
+        samples.append((api_path, method, expected, code, time.perf_counter_ns() - request_start))
+    return time.perf_counter() - start, samples
+
+
+def percentile(ordered, percent):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100.0))]
+
+
+def report(samples, elapsed):
+    endpoints = {}
+    for api_path, method, expected, code, duration in samples:
+        endpoint = endpoints.setdefault('%s %s' % (method, api_path), {'durations': [], 'codes': {}, 'mismatch': 0})
+        endpoint['durations'].append(duration)
+        endpoint['codes'][code] = endpoint['codes'].get(code, 0) + 1
+        if code != expected:
+            endpoint['mismatch'] += 1
+
+    result = {}
+    for name, endpoint in sorted(endpoints.items()):
+        durations = sorted(endpoint.pop('durations'))
+        endpoint.update({
+            'count': len(durations),
+            'mean_ms': round(sum(durations) / len(durations) / 1e6, 3),
+            'p50_ms': round(percentile(durations, 50) / 1e6, 3),
+            'p90_ms': round(percentile(durations, 90) / 1e6, 3),
+            'p99_ms': round(percentile(durations, 99) / 1e6, 3),
+            'max_ms': round(durations[-1] / 1e6, 3),
+        })
+        result[name] = endpoint
+    return {
+        'requests': len(samples),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else 0,
+        'mismatch': sum(endpoint['mismatch'] for endpoint in result.values()),
+        'endpoints': result,
+    }
+
+
+def replay(cases, target, workers=4, requests=None, rounds=1, processes=False):
+    """ replay the cases, ``requests`` total (cycle the cases) or every case ``rounds`` times """
+    total = requests or len(cases) * rounds
+    jobs = [cases[index % len(cases)] for index in range(total)]
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        results = list(executor.map(replay_worker, [target] * workers, [jobs[i::workers] for i in range(workers)]))
+    # workers run in parallel, the slowest one is the wall time (setup excluded)
+    elapsed = max(worker_elapsed for worker_elapsed, _ in results)
+    return report([sample for _, samples in results for sample in samples], elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fair.replay', description='Replay saved test UI cases')
+    parser.add_argument('store', help='case store: sqlite file (.db/.sqlite/.sqlite3) or local workspace')
+    parser.add_argument('--app', help="'package.module:app', request in process, also used to list the apis")
+    parser.add_argument('--url', help='server base url, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent workers')
+    parser.add_argument('--processes', action='store_true', help='process pool instead of thread pool')
+    parser.add_argument('--requests', type=int, help='total requests, cycle the cases')
+    parser.add_argument('--rounds', type=int, default=1, help='replay every case n times (without --requests)')
+    parser.add_argument('--output', help='write json to the file instead of stdout')
+    args = parser.parse_args(argv)
+
+    if not args.app and not args.url:
+        parser.error('one of --app or --url is required')
+    if args.app and '' not in sys.path:
+        sys.path.insert(0, '')          # import the app from current directory like python -m does
+
+    storage = load_store(args.store)
+    try:
+        cases = collect_cases(storage, load_app(args.app) if args.app else None)
+    except NotImplementedError:
+        parser.error('%s can not list its apis, use --app' % type(storage).__name__)
+    if not cases:
+        parser.error('no case found in %s' % args.store)
+
+    target = ('url', args.url) if args.url else ('app', args.app)
+    result = replay(cases, target, args.workers, args.requests, args.rounds, args.processes)
+    content = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(content)
+    else:
+        print(content)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,76 @@
-import json
 import logging
-from flask import Response, request
+from contextvars import ContextVar
+from flask import Response, request, stream_with_context
 
 log = logging.getLogger(__name__)
 
 JSON = 'application/json; charset=utf-8'
 JSON_P = 'application/javascript; charset=utf-8'
 
+current_meta = ContextVar('current_meta', default=None)     # meta of the api executing in current thread
+
 
 class ResponseRaise(Exception):
 
-    def __init__(self, code, data=None, status=None):
+    def __init__(self, code, data=None, status=None, meta=None):
+        self.meta = meta or current_meta.get() or request.meta
         self.code = code
-        self.info = request.meta.code_dict[code]
+        self.info = self.meta.code_dict[code]
         self.data = data
         self.status = status
 
     def response(self):
         raise NotImplementedError()
 
+    def encode(self):
+        """ { "code": "", "info": "",  "data": ... } json bytes """
+        return self.meta.code_prefix[self.code] + self.meta.setts.dumps(self.data) + b'}'
+
 
 class JsonRaise(ResponseRaise):
     """Json format：{ "code": "", "info": "",  "data": ... } """   # 请勿修改该 doc str，doc_ui 界面要使用
 
     def response(self):
-        ret = {'code': self.code, 'info': self.info, 'data': self.data}
-        if self.code == 'exception':
-            log.exception('%s %s', request.path, ret)
-        return Response(json.dumps(ret), content_type=JSON, status=self.status)
+        return Response(self.encode(), content_type=JSON, status=self.status)
+
+
+class JsonStreamRaise(JsonRaise):
+    """Json format：{ "code": "", "info": "",  "data": [...] }  data is streamed in chunks"""   # doc_ui 界面要使用
+
+    chunk_size = 1000           # items per written chunk
+
+    def encode(self):
+        if self.data is None or isinstance(self.data, (dict, str, bytes)):
+            return super(JsonStreamRaise, self).encode()
+        return self.meta.code_prefix[self.code] + self.meta.setts.dumps(list(self.data)) + b'}'
+
+    def response(self):
+        # dict, str and None are not streamed
+        if self.data is None or isinstance(self.data, (dict, str, bytes)):
+            return super(JsonStreamRaise, self).response()
+
+        prefix = self.meta.code_prefix[self.code]
+        dumps = self.meta.setts.dumps
+        chunk_size = self.chunk_size
+        items = iter(self.data)
+        path = request.path
+
+        def generate():
+            yield prefix + b'['
+            separator = b''
+            chunk = []
+            try:
+                for item in items:
+                    chunk.append(dumps(item))
+                    if len(chunk) == chunk_size:
+                        yield separator + b', '.join(chunk)
+                        separator = b', '
+                        chunk = []
+            except Exception:
+                log.exception('%s stream response interrupted', path)
+                raise
+            if chunk:
+                yield separator + b', '.join(chunk)
+            yield b']}'
+
+        return Response(stream_with_context(generate()), content_type=JSON, status=self.status)
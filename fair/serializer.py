@@ -0,0 +1,58 @@
+import json
+import decimal
+import datetime
+
+
+def default(obj):
+    """ Fallback for the types json not support natively
+    """
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    raise TypeError('Object of type %s is not JSON serializable' % type(obj).__name__)
+
+
+def json_dumps(data):
+    return json.dumps(data, default=default).encode()
+
+
+def get_serializers():
+    """ json serializers,  name -> function(data) return bytes
+
+    orjson / ujson / rapidjson are added when they can be imported.
+    """
+    serializers = {'json': json_dumps}
+
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        def orjson_dumps(data):
+            return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+        serializers['orjson'] = orjson_dumps
+
+    try:
+        import ujson
+    except ImportError:
+        pass
+    else:
+        def ujson_dumps(data):
+            return ujson.dumps(data, default=default).encode()
+        serializers['ujson'] = ujson_dumps
+
+    try:
+        import rapidjson
+    except ImportError:
+        pass
+    else:
+        def rapidjson_dumps(data):
+            return rapidjson.dumps(data, default=default).encode()
+        serializers['rapidjson'] = rapidjson_dumps
+
+    return serializers
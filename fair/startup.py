@@ -0,0 +1,116 @@
+import os
+import atexit
+import logging
+import tracemalloc
+from time import perf_counter
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+PHASES = ('doc_parse', 'rst_to_html', 'init_view', 'add_url_rule')
+
+
+class StartupProfiler(object):
+    """ Route registration profiler, enabled by environment variable FAIR_STARTUP_REPORT
+
+    FAIR_STARTUP_REPORT=1           log the report
+    FAIR_STARTUP_REPORT=/xx/report  write the report to the file
+
+    The report is output at the first request (all routes are registered), or at exit if no request.
+    Time and memory of a phase exclude the nested phases, e.g. doc_parse not include rst_to_html.
+    Memory is the net traced (tracemalloc) memory, garbage collection can make it negative.
+    Tracing memory slows the startup down, compare the routes with each other, not with a normal start.
+    The one time docutils import is measured before the routes and reported on its own line.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.routes = dict()                    # rule -> {phase: [seconds, bytes]}
+        self.stack = []                         # [start time, start memory, children seconds, children bytes]
+        self.imports = dict()                   # name -> [seconds, bytes]
+        self.reported = False
+        self.tracing = not tracemalloc.is_tracing()     # stop tracing after the report if started here
+        if self.tracing:
+            tracemalloc.start()
+        atexit.register(self.output)
+
+    def preload_docutils(self):
+        """ import docutils now, so the first route's doc_parse does not absorb it """
+        from .api_meta import parse_doc_string
+        from .utility import rst_to_html
+
+        start, memory = perf_counter(), tracemalloc.get_traced_memory()[0]
+        # the parser, reader and writer modules are imported at the first publish
+        parse_doc_string(':x: y', rst_to_html)
+        self.imports['docutils'] = [perf_counter() - start, tracemalloc.get_traced_memory()[0] - memory]
+
+    @contextmanager
+    def measure(self, rule, phase):
+        frame = [perf_counter(), tracemalloc.get_traced_memory()[0], 0.0, 0]
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            seconds = perf_counter() - frame[0]
+            memory = tracemalloc.get_traced_memory()[0] - frame[1]
+            item = self.routes.setdefault(rule, dict()).setdefault(phase, [0.0, 0])
+            item[0] += seconds - frame[2]
+            item[1] += memory - frame[3]
+            if self.stack:
+                self.stack[-1][2] += seconds
+                self.stack[-1][3] += memory
+
+    def wrap(self, rule, phase, func):
+        def wrapper(*args, **kwargs):
+            with self.measure(rule, phase):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def report(self):
+        rows = []
+        for rule, phases in self.routes.items():
+            seconds = sum(item[0] for item in phases.values())
+            memory = sum(item[1] for item in phases.values())
+            rows.append((seconds, memory, rule, phases))
+        rows.sort(key=lambda row: row[0], reverse=True)
+
+        total_seconds = sum(row[0] for row in rows)
+        total_memory = sum(row[1] for row in rows)
+        lines = ['Fair startup report: %d routes, %.3f s, %.1f KB' % (len(rows), total_seconds, total_memory / 1024.0),
+                 '%-40s %10s %10s ' % ('rule', 'total ms', 'net KB') + ' '.join('%14s' % p for p in PHASES)]
+        for name, (seconds, memory) in self.imports.items():
+            lines.insert(1, 'import %s: %.2f ms, %.1f KB (not included in routes)' % (name, seconds * 1000,
+                                                                                    memory / 1024.0))
+        for seconds, memory, rule, phases in rows:
+            cells = []
+            for phase in PHASES:
+                item = phases.get(phase, (0.0, 0))
+                cells.append('%7.2f/%6.1f' % (item[0] * 1000, item[1] / 1024.0))
+            lines.append('%-40s %10.2f %10.1f ' % (rule, seconds * 1000, memory / 1024.0) + ' '.join(cells))
+        lines.append('(phase cells are ms/KB)')
+        return os.linesep.join(lines)
+
+    def output(self):
+        if self.reported:
+            return
+        self.reported = True
+        if self.tracing:
+            tracemalloc.stop()              # requests must not pay the tracing overhead
+        if not self.routes:
+            return
+        report = self.report()
+        if self.target == '1':
+            log.info(report)
+        else:
+            with open(self.target, 'w') as report_file:
+                report_file.write(report + os.linesep)
+
+    def on_request(self):
+        if not self.reported:
+            self.output()
+
+
+def get_startup_profiler():
+    target = os.environ.get('FAIR_STARTUP_REPORT')
+    return StartupProfiler(target) if target and target != '0' else None
@@ -0,0 +1,109 @@
+from bisect import bisect_left
+from time import perf_counter_ns
+
+PHASES = ('params', 'plugin', 'structure', 'view', 'response')
+
+# histogram bucket upper bounds (nanosecond): 1us, 2us, 4us ... ~1s, the last bucket is unlimited
+BUCKETS = tuple(1000 * 2 ** i for i in range(21))
+
+
+class Histogram(object):
+    """ Duration histogram with preallocated buckets
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, duration):
+        self.counts[bisect_left(BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def percentile(self, percent):
+        """ bucket upper bound of the percentile (nanosecond) """
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100.0
+        accumulate = 0
+        for index, count in enumerate(self.counts):
+            accumulate += count
+            if accumulate >= rank:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean_ns': self.total // self.count if self.count else 0,
+            'max_ns': self.max,
+            'p50_ns': self.percentile(50),
+            'p90_ns': self.percentile(90),
+            'p99_ns': self.percentile(99),
+        }
+
+
+class PhaseTimer(object):
+    """ Timer of one request, each lap() record the duration of next phase in PHASES
+    """
+    __slots__ = ('histograms', 'start', 'last', 'index')
+
+    def __init__(self, histograms):
+        self.histograms = histograms
+        self.start = self.last = perf_counter_ns()
+        self.index = 0
+
+    def lap(self):
+        if self.index < len(PHASES) - 1:
+            now = perf_counter_ns()
+            self.histograms[PHASES[self.index]].add(now - self.last)
+            self.last = now
+            self.index += 1
+
+    def end(self):
+        now = perf_counter_ns()
+        self.histograms['response'].add(now - self.last)
+        self.histograms['total'].add(now - self.start)
+
+
+class EndpointStats(object):
+
+    def __init__(self):
+        self.histograms = {phase: Histogram() for phase in PHASES + ('total',)}
+
+    def timer(self):
+        return PhaseTimer(self.histograms)
+
+    def to_dict(self):
+        return {phase: histogram.to_dict() for phase, histogram in self.histograms.items()}
+
+
+class Stats(object):
+    """ Per endpoint request phase timings
+
+        endpoints define {
+            url_1: {
+                'GET': EndpointStats,
+                'POST|PUT': EndpointStats
+            },
+            ...
+        }
+    """
+
+    def __init__(self):
+        self.endpoints = dict()
+
+    def endpoint(self, rule, http_methods):
+        methods = list(http_methods)
+        methods.sort()
+        return self.endpoints.setdefault(rule, dict()).setdefault('|'.join(methods), EndpointStats())
+
+    def to_dict(self, rule=None):
+        rules = [rule] if rule else self.endpoints.keys()
+        return {rule: {methods: endpoint_stats.to_dict()
+                       for methods, endpoint_stats in self.endpoints.get(rule, {}).items()} for rule in rules}
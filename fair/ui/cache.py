@@ -0,0 +1,23 @@
+import hashlib
+from datetime import datetime, timezone
+from flask import request, Response, current_app as app
+
+
+def cached_page(key, render):
+    """ Rendered ui page response, support ETag / Last-Modified (304)
+
+    page cache is app.api.ui_pages, it is cleared when app's url map changed.
+
+    :param key: page cache key
+    :param render: page render function, return html string
+    """
+    page = app.api.ui_pages.get(key)
+    if page is None:
+        html = render().encode()
+        page = (html, hashlib.sha1(html).hexdigest(), datetime.now(timezone.utc).replace(microsecond=0))
+        app.api.ui_pages[key] = page
+    html, etag, last_modified = page
+    response = Response(html, content_type='text/html; charset=utf-8')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response.make_conditional(request)
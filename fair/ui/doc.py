@@ -2,10 +2,16 @@ from flask import request, render_template, current_app as app
 
 from ..utility import rst_to_html, text_to_html, ContextClass
 from ..api_meta import Meta
+from .cache import cached_page
 
 
 def doc_ui():
-    views = app.api.url_map[request.url_rule.rule[:-5]]
+    rule = request.url_rule.rule[:-5]
+    return cached_page((rule, 'doc'), lambda: render_doc(rule))
+
+
+def render_doc(rule):
+    views = app.api.url_map[rule]
     apis = []
     for view_func in views:
         meta = view_func.meta       # type: Meta
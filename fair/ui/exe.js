@@ -109,10 +109,10 @@ function get_params(auto_gen_param){
 
                 }
 
-            } else if (type.substr(0, 5) == 'List[') {
+            } else if (type.substr(0, 5) == 'List[' || type.substr(0, 6) == 'Array[') {
                 if ($.trim(value)) {
                     params[this.id] = [];
-                    var _type = type.substr(5, type.length - 6);
+                    var _type = type.substring(type.indexOf('[') + 1, type.length - 1);
                     var _param = $.trim(value).split(',');
                     for (var index = 0; index < _param.length; index++) {
                         if (_type == 'Int' || _type == 'Float') {
@@ -251,7 +251,7 @@ function execute(){
             var is_json = true;
             $("input[name='param']").each(function() {
                 var type = $("#" + this.id + "_type").val();
-                if (type.substr(0, 5) == 'List[') {
+                if (type.substr(0, 5) == 'List[' || type.substr(0, 6) == 'Array[') {
                     alert('application/x-www-form-urlencoded not support List parameter, Please use application/json.')
                     is_json = false;
                     return;
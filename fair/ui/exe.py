@@ -7,6 +7,7 @@ from fair.utility import text_to_html
 from ..plugin import jsonp
 from ..api_meta import Meta
 from ..utility import ContextClass
+from .cache import cached_page
 
 
 def get_api_params(param_list, config):
@@ -46,6 +47,10 @@ def exe_ui():
     if not c.meta:
         return 'Http method [%s] not support' % c.method
 
+    return cached_page((request.url_rule.rule[:-5], c.method), lambda: render_exe(c))
+
+
+def render_exe(c):
     context = {'api_config': {}, 'api_json_p': None}
 
     c.url = request.path
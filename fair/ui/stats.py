@@ -0,0 +1,19 @@
+from flask import request, Response, current_app as app
+
+from ..response import JSON
+
+
+def stats_ui():
+    rule = request.url_rule.rule[:-7]
+    stats = app.api.stats.to_dict(rule)
+    for view_func in app.api.url_map[rule]:
+        meta = getattr(view_func, 'meta', None)
+        if meta and (meta.cache or meta.single_flight):
+            methods = list(meta.http_methods)
+            methods.sort()
+            method_stats = stats[rule].setdefault('|'.join(methods), {})
+            if meta.cache:
+                method_stats['cache'] = meta.cache.stats()
+            if meta.single_flight:
+                method_stats['single_flight'] = meta.single_flight.stats()
+    return Response(app.api.dumps(stats), content_type=JSON)
@@ -1,11 +1,12 @@
 import os
+import json
 import string
+import asyncio
 import logging
 import pkgutil
+import threading
 from flask import request
 from importlib import import_module
-from docutils.core import publish_string
-from docutils.writers.html4css1 import Writer, HTMLTranslator
 
 log = logging.getLogger(__name__)
 
@@ -56,27 +57,38 @@ def class_name_to_api_name(class_name):
     return api_name
 
 
-class HTMLFragmentTranslator(HTMLTranslator):
+html_fragment_writer = None
 
-    def __init__(self, document):
-        HTMLTranslator.__init__(self, document)
-        self.head_prefix = ['', '', '', '', '']
-        self.body_prefix = []
-        self.body_suffix = []
-        self.stylesheet = []
 
-    def unimplemented_visit(self, node):
-        pass
+def get_html_fragment_writer():
+    """ docutils is imported at first use, workers that never render html do not pay for it
+    """
+    global html_fragment_writer
+    if html_fragment_writer is None:
+        from docutils.writers.html4css1 import Writer, HTMLTranslator
+
+        class HTMLFragmentTranslator(HTMLTranslator):
 
+            def __init__(self, document):
+                HTMLTranslator.__init__(self, document)
+                self.head_prefix = ['', '', '', '', '']
+                self.body_prefix = []
+                self.body_suffix = []
+                self.stylesheet = []
 
-html_fragment_writer = Writer()
-html_fragment_writer.translator_class = HTMLFragmentTranslator
+            def unimplemented_visit(self, node):
+                pass
+
+        html_fragment_writer = Writer()
+        html_fragment_writer.translator_class = HTMLFragmentTranslator
+    return html_fragment_writer
 
 
 def rst_to_html(source):
     if not source:
         return ''
-    html = publish_string(source, writer=html_fragment_writer)
+    from docutils.core import publish_string
+    html = publish_string(source, writer=get_html_fragment_writer())
     html = html.split(b'<div class="document">\n\n\n')[1][:-8]     # len('\n</div>\n') == 8
     if html.startswith(b'<p>'):
         html = html[3:]
@@ -97,14 +109,86 @@ def text_to_html(text):
     return text
 
 
+class RequestParams(object):
+    """ Read only view of request parameters
+
+    Parameters consumed by plugins are hidden instead of deleted, so the request's args / form / json
+    is shared by parameters extraction, plugins and structure_params without copy.
+    ``source`` is the original mapping (include consumed parameters).
+    """
+    __slots__ = ('source', 'consumed')
+
+    def __init__(self, source):
+        self.source = source
+        self.consumed = None
+
+    def consume(self, *names):
+        if self.consumed is None:
+            self.consumed = set(names)
+        else:
+            self.consumed.update(names)
+
+    __delitem__ = consume
+
+    def __contains__(self, name):
+        return name in self.source and not (self.consumed and name in self.consumed)
+
+    def __getitem__(self, name):
+        if self.consumed and name in self.consumed:
+            raise KeyError(name)
+        return self.source[name]
+
+    def get(self, name, default=None):
+        if self.consumed and name in self.consumed:
+            return default
+        return self.source.get(name, default)
+
+    def items(self):
+        if not self.consumed:
+            return self.source.items()
+        consumed = self.consumed
+        return ((name, value) for name, value in self.source.items() if name not in consumed)
+
+    def keys(self):
+        return [name for name, value in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def to_dict(self):
+        return dict(self.items())
+
+
 def get_request_params():
     if request.method == 'GET':
-        return request.args.copy().to_dict()
+        return RequestParams(request.args)
     else:
-        if request.json is None:
-            return request.form.copy().to_dict()    # Content-Type: application/x-www-form-urlencoded
+        if not request.is_json:
+            return RequestParams(request.form)      # Content-Type: application/x-www-form-urlencoded
         else:
-            return request.json.copy()              # Content-Type: application/json
+            return RequestParams(request.json)      # Content-Type: application/json
+
+
+def params_key(params):
+    """ normalized structured parameters, used as key of response cache and single flight """
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+thread_local = threading.local()
+
+
+def run_coroutine(coroutine):
+    """ run coroutine (async def view's return) on current thread's event loop
+
+    The loop is created once per thread and reused by the following requests.
+    """
+    loop = getattr(thread_local, 'event_loop', None)
+    if loop is None or loop.is_closed():
+        loop = thread_local.event_loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine)
 
 
 def get_cls_with_path(cls_path):
@@ -121,19 +205,47 @@ def iterate_package(package):
 
 
 def structure_params(view_func, params_proto, params):
-    # check the necessary parameter's value is sed
-    for param in view_func.meta.param_not_null:
-        if params_proto.get(param, '') == '':       # 0 is ok
-            raise view_func.meta.response('param_missing', {'parameter': param})
-
-    ret = view_func.meta.param_default.copy()
-    # parameter's type of proof and conversion
-    for param, value in params.items():
-        if param not in view_func.meta.param_index:
-            raise view_func.meta.response('param_unknown', {'parameter': param, 'value': value})
-        if value is not None:
-            try:
-                ret[param] = view_func.meta.param_types[param].structure(view_func, value)
-            except Exception as e:
-                raise view_func.meta.response(view_func.meta.param_types[param].error_code, {'parameter': param, 'value': value})
-    return ret
+    return view_func.meta.structure_params(params_proto, params)
+
+
+def compile_structure_params(view_func, meta):
+    """ build the view's parameters check and conversion function, meta's lookups are bound to locals once
+    """
+    from .parameter import Param, ItemError
+
+    param_not_null = tuple(meta.param_not_null)
+    param_default = dict(meta.param_default)
+    response = meta.response
+    converters = {}
+    for param, param_type in meta.param_types.items():
+        structure = param_type.structure
+        if getattr(structure, '__func__', None) is Param.structure.__func__:
+            structure = None                        # Param does not limit value, skip the call
+        converters[param] = (structure, param_type.error_code)
+    param_index = frozenset(converters)
+
+    def _structure_params(params_proto, params):
+        # check the necessary parameter's value is sed
+        for param in param_not_null:
+            if params_proto.get(param, '') == '':   # 0 is ok
+                raise response('param_missing', {'parameter': param})
+
+        ret = param_default.copy()
+        # parameter's type of proof and conversion
+        for param, value in params.items():
+            if param not in param_index:
+                raise response('param_unknown', {'parameter': param, 'value': value})
+            if value is not None:
+                structure, error_code = converters[param]
+                if structure is None:
+                    ret[param] = value
+                    continue
+                try:
+                    ret[param] = structure(view_func, value)
+                except ItemError as e:
+                    raise response(e.error_code, dict({'parameter': param}, **e.data))
+                except Exception:
+                    raise response(error_code, {'parameter': param, 'value': value})
+        return ret
+
+    return _structure_params